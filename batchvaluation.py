@@ -0,0 +1,182 @@
+"""
+Valuation of many bodies at once, meant for offline processing of journal archives.
+
+All Scan events are turned into column arrays, and every catalog entry is evaluated
+against every body as one boolean matrix. NumPy is optional (EDMC does not ship it);
+without it, the same results are calculated body by body.
+"""
+from biologial import EligibilityIndex, FieldIndex, RangeIndex, eligibility_index
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BatchValuation:
+    """
+    Per-body, per-genus value ranges: min_values[body][genus] and max_values[body][genus],
+    with genus columns in the order of <genera>. (0, 0) means the genus can not grow there.
+    """
+    def __init__(self, genera: list[str], min_values: any, max_values: any):
+        self.genera: list[str] = genera
+        self.min_values = min_values
+        self.max_values = max_values
+
+    def __len__(self) -> int:
+        return len(self.min_values)
+
+    def ranges(self, body_index: int) -> dict[str, tuple[float, float]]:
+        """Same result as EligibilityIndex.genus_ranges for that body"""
+        return {
+            genus: (float(self.min_values[body_index][col]), float(self.max_values[body_index][col]))
+            for col, genus in enumerate(self.genera)
+        }
+
+    def anonymous(self, count: int) -> list[tuple[float, float]]:
+        """Per body: same result as helpers.get_value_range_anonymous(body, count)"""
+        if numpy is None or not isinstance(self.min_values, numpy.ndarray):
+            res: list[tuple[float, float]] = []
+            for mins, maxs in zip(self.min_values, self.max_values):
+                possible: list[tuple[float, float]] = [(mn, mx) for mn, mx in zip(mins, maxs) if mn != 0.0]
+                res.append((
+                    sum(sorted(mn for mn, _ in possible)[:count]),
+                    sum(sorted(mx for _, mx in possible)[-count:])
+                ))
+            return res
+
+        possible = self.min_values != 0.0
+        lower = numpy.sort(numpy.where(possible, self.min_values, numpy.inf), axis=1)[:, :count]
+        upper = numpy.sort(numpy.where(possible, self.max_values, -numpy.inf), axis=1)[:, -count:]
+        return [
+            (float(mn), float(mx))
+            for mn, mx in zip(sequential_sum(lower), sequential_sum(upper))
+        ]
+
+
+def sequential_sum(values: 'numpy.ndarray') -> 'numpy.ndarray':
+    """
+    Row sums in ascending column order, skipping the +-inf fillers.
+    numpy.sum adds pairwise, which may differ from the builtin sum() in the last digit.
+    """
+    total = numpy.zeros(values.shape[0])
+    for col in range(values.shape[1]):
+        total += numpy.where(numpy.isinf(values[:, col]), 0.0, values[:, col])
+    return total
+
+
+def mask_to_row(mask: int, size: int) -> list[bool]:
+    return [bool(mask >> bit & 1) for bit in range(size)]
+
+
+def field_matrix(field: FieldIndex, scans: list[dict], size: int) -> 'numpy.ndarray':
+    """Boolean N x S matrix: catalog entry S accepts the field value of body N"""
+    if isinstance(field, RangeIndex):
+        column = numpy.fromiter(
+            (scan.get(field.key, numpy.nan) for scan in scans), dtype=float, count=len(scans)
+        )
+        table = numpy.array([mask_to_row(m, size) for m in field.interval_masks], dtype=bool)
+        rows = table[numpy.searchsorted(field.breakpoints, column, side='right')]
+        rows[numpy.isnan(column)] = True
+        return rows
+
+    # categorical: one row per distinct field value
+    body_codes = numpy.fromiter((field.code(scan) for scan in scans), dtype=numpy.intp, count=len(scans))
+    table = numpy.array([mask_to_row(m, size) for m in field.code_masks], dtype=bool)
+    return table[body_codes]
+
+
+def value_bodies(scans: list[dict], index: EligibilityIndex|None = None) -> BatchValuation:
+    """
+    Value a list of Scan events (or Body objects) in one go
+    """
+    if index is None:
+        index = eligibility_index()
+    genera: list[str] = list(index.genus_species)
+
+    if numpy is None:
+        all_ranges: list[dict[str, tuple[float, float]]] = [index.genus_ranges(scan) for scan in scans]
+        return BatchValuation(
+            genera,
+            [[r[genus][0] for genus in genera] for r in all_ranges],
+            [[r[genus][1] for genus in genera] for r in all_ranges]
+        )
+
+    eligible = numpy.ones((len(scans), index.size), dtype=bool)
+    for field in index.fields:
+        eligible &= field_matrix(field, scans, index.size)
+    # an empty body description does not filter anything
+    eligible[[not scan for scan in scans]] = True
+
+    worth = numpy.zeros(index.size)
+    for bio_index, bio in enumerate(index.catalog):
+        worth[bio_index] = bio.net_worth
+
+    min_values = numpy.zeros((len(scans), len(genera)))
+    max_values = numpy.zeros((len(scans), len(genera)))
+    for col, genus in enumerate(genera):
+        bits: list[int] = [bit.bit_length() - 1 for _, bit in index.genus_species[genus]]
+        sub = eligible[:, bits]
+        any_eligible = sub.any(axis=1)
+        min_values[:, col] = numpy.where(
+            any_eligible, numpy.where(sub, worth[bits], numpy.inf).min(axis=1), 0.0
+        )
+        max_values[:, col] = numpy.where(
+            any_eligible, numpy.where(sub, worth[bits], -numpy.inf).max(axis=1), 0.0
+        )
+    return BatchValuation(genera, min_values, max_values)
+
+
+def test_value_bodies() -> None:
+    from helpers import get_value_range_anonymous
+
+    scans: list[dict] = [{}, {"BodyName": "unknown"}]
+    for temperature in (150, 175, 190, 250):
+        for gas in ("CarbonDioxide", "Water", "Neon"):
+            for planet_class in ("Rocky body", "High metal content body", "Icy body"):
+                scans.append({
+                    "PlanetClass": planet_class,
+                    "AtmosphereComposition": [{"Name": gas, "Percent": 100.0}],
+                    "Volcanism": "",
+                    "SurfaceTemperature": temperature,
+                    "SurfaceGravity": 2.0,
+                })
+
+    index: EligibilityIndex = eligibility_index()
+    valuation: BatchValuation = value_bodies(scans)
+    assert len(valuation) == len(scans)
+    for count in (1, 3, 10):
+        anonymous: list[tuple[float, float]] = valuation.anonymous(count)
+        for n, scan in enumerate(scans):
+            assert valuation.ranges(n) == index.genus_ranges(scan)
+            assert anonymous[n] == get_value_range_anonymous(scan, count)
+
+
+def test_numpy_and_fallback(monkeypatch) -> None:
+    import helpers
+
+    scans: list[dict] = [{}]
+    for temperature in (150, 190, 250, 400):
+        for gravity in (0.05, 0.3, 2.0):
+            for planet_class in ("Rocky body", "High metal content body", "Icy body", "Rocky ice body"):
+                scans.append({
+                    "PlanetClass": planet_class,
+                    "AtmosphereComposition": [{"Name": "CarbonDioxide", "Percent": 100.0}],
+                    "SurfaceTemperature": temperature,
+                    "SurfaceGravity": gravity * 9.81,
+                })
+    scans.append({"PlanetClass": "Icy body", "SurfaceTemperature": 150})
+
+    assert numpy is not None, "numpy is a test requirement, see requirements.txt"
+    vectorised: BatchValuation = value_bodies(scans)
+    assert isinstance(vectorised.min_values, numpy.ndarray)
+    monkeypatch.setattr(f'{__name__}.numpy', None)
+    fallback: BatchValuation = value_bodies(scans)
+    assert isinstance(fallback.min_values, list)
+
+    for valuation in (vectorised, fallback):
+        for n, scan in enumerate(scans):
+            ranges: dict[str, tuple[float, float]] = valuation.ranges(n)
+            for genus in valuation.genera:
+                assert ranges[genus] == helpers.get_value_range(genus, scan), (genus, scan)
+    assert vectorised.anonymous(3) == fallback.anonymous(3)
@@ -1,24 +1,48 @@
 # All filter criteria taken from https://elite-dangerous.fandom.com/wiki/Exobiology_Sample_Values_and_Details
+# The catalog itself lives in species.json, see load_catalog for its format.
+import hashlib
+import json
+import os
+import pickle
+from bisect import bisect_right
 
 
 class Biological:
-    def __init__(self, category: str, name: str, net_worth_millions: float, filters: list = ()):
+    def __init__(
+            self, category: str, name: str, net_worth_millions: float, requirements: list[list['Filter']] = ()
+    ):
         self.category: str = category
         self.name: str = name
         self.net_worth: float = net_worth_millions
-        self.filters: list = filters
+        # growth conditions: each OR-group needs at least one of its filters to accept the planet
+        self.requirements: list[list[Filter]] = requirements
 
     def can_grow_on(self, planet: dict) -> bool:
-        for f in self.filters:
-            if not f.accepts(planet):
+        for group in self.requirements:
+            if not any(f.accepts(planet) for f in group):
                 return False
         return True
 
+    def clauses(self) -> list[list['Filter']]:
+        """
+        Growth conditions as a list of OR-groups, all of which must accept the planet.
+        This is what the compiled EligibilityIndex is built from, so it has to match can_grow_on.
+        """
+        return self.requirements
+
     def display_name(self) -> str:
         return f'{self.category} {self.name}'
 
 
 class Filter:
+    # Scan field the filter looks at; planets without that field are always accepted
+    key: str = ''
+
+    @staticmethod
+    def token(value: any) -> any:
+        """Hashable stand-in for a field value; values with equal tokens must be accepted alike"""
+        return value
+
     def accepts(self, planet: dict) -> bool:
         """ Planet entry is a "Scan" result:
         {
@@ -65,19 +89,27 @@ class Filter:
 
 
 class Atmosphere(Filter):
+    key: str = 'AtmosphereComposition'
+
+    @staticmethod
+    def token(value: list[dict]|frozenset) -> frozenset:
+        """Set of gas names; Body already keeps its atmosphere in that form"""
+        if isinstance(value, frozenset):
+            return value
+        return frozenset(x["Name"] for x in value)
+
     def __init__(self, gas: str):
         self.required: str = gas
 
     def accepts(self, planet: dict) -> bool:
         if 'AtmosphereComposition' not in planet:
             return True
-        return self.required in [
-            x["Name"]
-            for x in planet["AtmosphereComposition"]
-        ]
+        return self.required in Atmosphere.token(planet["AtmosphereComposition"])
 
 
 class Volcanism(Filter):
+    key: str = 'Volcanism'
+
     def __init__(self, volcanism: str):
         self.required = volcanism
 
@@ -92,6 +124,8 @@ class Volcanism(Filter):
 
 
 class Planet(Filter):
+    key: str = 'PlanetClass'
+
     def __init__(self, planet_type: str):
         self.required: str = planet_type
 
@@ -103,235 +137,533 @@ class Planet(Filter):
         )
 
 
-class Temperature(Filter):
-    def __init__(self, min_temp: int, max_temp: int):
-        self.min: int = min_temp
-        self.max: int = max_temp
+class RangeFilter(Filter):
+    """
+    Accepts planets with min <= <key> < max
+    """
+    def __init__(self, min_value: float, max_value: float):
+        self.min: float = min_value
+        self.max: float = max_value
 
     def accepts(self, planet: dict) -> bool:
         return (
-                self.min <= planet['SurfaceTemperature'] < self.max
-                if 'SurfaceTemperature' in planet
+                self.min <= planet[self.key] < self.max
+                if self.key in planet
                 else True
         )
 
 
-class Gravity(Filter):
+class Temperature(RangeFilter):
+    key: str = 'SurfaceTemperature'
+
+
+class Gravity(RangeFilter):
+    key: str = 'SurfaceGravity'
     one_g: float = 9.81
 
     def __init__(self, min_grav: float, max_grav: float):
-        self.min: float = min_grav * Gravity.one_g
-        self.max: float = max_grav * Gravity.one_g
+        super().__init__(min_grav * Gravity.one_g, max_grav * Gravity.one_g)
+
+
+class Distance(RangeFilter):
+    # TODO: for anything NOT orbiting a sun (moons, twin planets, ...)
+    #       Periapsis is quite possibly the wrong thing to check; instead, a recursive
+    #       search over the body`s parents would have to be done...
+    key: str = 'Periapsis'
+
+
+# filter name in species.json -> filter class; range filters take [min, max]
+filter_types: dict[str, type] = {
+    'atmosphere': Atmosphere,
+    'volcanism': Volcanism,
+    'planet': Planet,
+    'temperature': Temperature,
+    'gravity': Gravity,
+    'periapsis': Distance,
+}
+
+
+def parse_filter(spec: any, where: str) -> Filter:
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f'{where}: a filter is an object with exactly one key, not {spec!r}')
+    kind, arg = next(iter(spec.items()))
+    if kind not in filter_types:
+        raise ValueError(f'{where}: unknown filter {kind!r}')
+    filter_type: type = filter_types[kind]
+    if issubclass(filter_type, RangeFilter):
+        if (
+                not isinstance(arg, list) or len(arg) != 2
+                or not all(isinstance(x, (int, float)) for x in arg) or not arg[0] < arg[1]
+        ):
+            raise ValueError(f'{where}: {kind} needs a range [min, max], not {arg!r}')
+        return filter_type(*arg)
+    if not isinstance(arg, str) or not arg:
+        raise ValueError(f'{where}: {kind} needs a name, not {arg!r}')
+    return filter_type(arg)
+
+
+def parse_requirements(specs: any, where: str) -> list[list[Filter]]:
+    """
+    A list of filters which all have to accept the planet; {"any": [filters]} is an OR-group,
+    e.g. [{"gravity": [0, 0.27]}, {"any": [{"planet": "Rocky"}, {"planet": "High metal content"}]}]
+    """
+    if not isinstance(specs, list):
+        raise ValueError(f'{where}: "requires" must be a list')
+    groups: list[list[Filter]] = []
+    for spec in specs:
+        if isinstance(spec, dict) and list(spec) == ['any']:
+            if not isinstance(spec['any'], list) or not spec['any']:
+                raise ValueError(f'{where}: "any" needs a non-empty list of filters')
+            group: list[Filter] = [parse_filter(f, where) for f in spec['any']]
+            if len({f.key for f in group}) > 1:
+                raise ValueError(f'{where}: OR-group spans several Scan fields')
+            groups.append(group)
+        else:
+            groups.append([parse_filter(spec, where)])
+    return groups
+
+
+def load_catalog(data: dict) -> tuple[list[Biological], dict[str, tuple[str, list[str]]]]:
+    """
+    Validate the contents of species.json, and build the catalog entries and codex symbols from it:
+    {
+        "genera": {
+            "Aleoida": {
+                "codex": "Aleoids",                         // journal symbol stem, "$Codex_Ent_Aleoids_01_Name;"
+                "codex_species": ["Arcus", ...],            // species in codex number order
+                "requires": [...]                           // optional, applies to every species of the genus
+            }, ...
+        },
+        "species": [
+            {"genus": "Aleoida", "species": "Arcus", "value": 7.3, "requires": [...]}, ...
+        ]
+    }
+    A species may have several entries, one per set of conditions it grows under.
+    Raises ValueError on the first problem found.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('genera'), dict) or not isinstance(data.get('species'), list):
+        raise ValueError('species catalog needs a "genera" object and a "species" list')
+
+    codex: dict[str, tuple[str, list[str]]] = {}
+    genus_requirements: dict[str, list[list[Filter]]] = {}
+    for genus, info in data['genera'].items():
+        where: str = f'genus {genus}'
+        if not isinstance(info, dict) or not isinstance(info.get('codex'), str):
+            raise ValueError(f'{where}: needs a "codex" symbol stem')
+        names: any = info.get('codex_species', [])
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise ValueError(f'{where}: "codex_species" must be a list of species names')
+        codex[genus] = (info['codex'], names)
+        genus_requirements[genus] = parse_requirements(info.get('requires', []), where)
+
+    catalog: list[Biological] = []
+    for number, entry in enumerate(data['species'], start=1):
+        where: str = f'species entry {number}'
+        if not isinstance(entry, dict):
+            raise ValueError(f'{where}: must be an object')
+        genus: any = entry.get('genus')
+        name: any = entry.get('species')
+        value: any = entry.get('value')
+        if genus not in codex:
+            raise ValueError(f'{where}: unknown genus {genus!r}')
+        if not isinstance(name, str) or not name:
+            raise ValueError(f'{where}: needs a "species" name')
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f'{where} ({genus} {name}): needs a positive "value" in millions')
+        catalog.append(Biological(
+            genus, name, float(value),
+            genus_requirements[genus] + parse_requirements(entry.get('requires', []), f'{where} ({genus} {name})')
+        ))
+
+    known: set[str] = {bio.display_name() for bio in catalog}
+    for genus, (_stem, names) in codex.items():
+        for name in names:
+            if f'{genus} {name}' not in known:
+                raise ValueError(f'genus {genus}: codex species {name} has no catalog entry')
+    return catalog, codex
 
-    def accepts(self, planet: dict) -> bool:
-        return (
-                self.min <= planet['SurfaceGravity'] < self.max
-                if 'SurfaceGravity' in planet
-                else True
-        )
 
+def get_bio_for_species(name: str) -> Biological:
+    index: SpeciesIndex = species_index()
+    species_id: int = index.species_ids.get(name, -1)
+    if species_id < 0:
+        return Biological(name, '?', 999.0)
+    return index.species[species_id]
 
-class Distance(Filter):
-    def __init__(self, min_distance: float, max_distance: float):
-        self.min: float = min_distance
-        self.max: float = max_distance
 
-    def accepts(self, planet: dict) -> bool:
-        # TODO: for anything NOT orbiting a sun (moons, twin planets, ...)
-        #       Periapsis is quite possibly the wrong thing to check; instead, a recursive
-        #       search over the body`s parents would have to be done...
-        return (
-            self.min <= planet['Periapsis'] < self.max
-            if 'Periapsis' in planet
-            else True
-        )
+class FieldIndex:
+    """
+    Maps the value of one Scan field to the bitset of catalog entries (bit N = catalog[N])
+    whose filters on that field accept it.
+    Every distinct field value gets a small integer code (0: field missing), with one mask per code.
+    """
+    def __init__(self, key: str, clauses: dict[int, list[list[Filter]]], all_mask: int):
+        self.key: str = key
+        self.clauses: dict[int, list[list[Filter]]] = clauses
+        self.all_mask: int = all_mask
+        self.token = next(iter(clauses.values()))[0][0].token
+        self.codes: dict[any, int] = {}
+        self.code_masks: list[int] = [all_mask]
+
+    def compute(self, planet: dict) -> int:
+        mask: int = self.all_mask
+        for bit, species_clauses in self.clauses.items():
+            for clause in species_clauses:
+                if not any(f.accepts(planet) for f in clause):
+                    mask &= ~(1 << bit)
+                    break
+        return mask
+
+    def code(self, planet: dict) -> int:
+        if self.key not in planet:
+            return 0
+        value: any = planet[self.key]
+        token: any = self.token(value)
+        if token not in self.codes:
+            self.codes[token] = len(self.code_masks)
+            self.code_masks.append(self.compute({self.key: value}))
+        return self.codes[token]
+
+    def mask(self, planet: dict) -> int:
+        return self.code_masks[self.code(planet)]
+
+
+class RangeIndex(FieldIndex):
+    """
+    Numeric variant: all filter limits are collected as sorted breakpoints,
+    and the result is constant between two neighbouring breakpoints.
+    The code is 1 + the number of breakpoints below or at the value.
+    """
+    def __init__(self, key: str, clauses: dict[int, list[list[Filter]]], all_mask: int):
+        super().__init__(key, clauses, all_mask)
+        self.breakpoints: list[float] = sorted({
+            limit
+            for species_clauses in clauses.values()
+            for clause in species_clauses
+            for f in clause
+            for limit in (f.min, f.max)
+        })
+        self.interval_masks: list[int] = [
+            self.compute({key: probe})
+            for probe in [float('-inf')] + self.breakpoints
+        ]
+        self.code_masks = [all_mask] + self.interval_masks
 
+    def code(self, planet: dict) -> int:
+        if self.key not in planet:
+            return 0
+        return 1 + bisect_right(self.breakpoints, planet[self.key])
 
-class Aleoida(Biological):
-    def __init__(self, name: str, net_worth_millions: float, filters: list = ()):
-        super().__init__('Aleoida', name, net_worth_millions, filters)
-        self.planet1: Filter = Planet('Rocky')
-        self.planet2: Filter = Planet('High metal content')
-        self.gravity: Filter = Gravity(0, 0.27)
 
-    def can_grow_on(self, planet: dict) -> bool:
-        if not self.gravity.accepts(planet):
-            return False
-        if not self.planet1.accepts(planet) and not self.planet2.accepts(planet):
-            return False
+class EligibilityIndex:
+    """
+    Compiled form of a species catalog: a planet is resolved to the bitset of
+    catalog entries that can grow on it with one lookup per Scan field.
+    """
+    def __init__(self, catalog: list[Biological]):
+        self.catalog: list[Biological] = catalog
+        self.size: int = len(catalog)
+        self.all_mask: int = (1 << self.size) - 1
+        # per genus: (net worth, bit) sorted by worth, so min/max are the first/last hit
+        self.genus_species: dict[str, list[tuple[float, int]]] = {}
+
+        field_clauses: dict[str, dict[int, list[list[Filter]]]] = {}
+        for bit, bio in enumerate(catalog):
+            self.genus_species.setdefault(bio.category, []).append((bio.net_worth, 1 << bit))
+            for clause in bio.clauses():
+                key: str = clause[0].key
+                if any(f.key != key for f in clause):
+                    raise ValueError(f'{bio.display_name()}: OR-group spans several Scan fields')
+                field_clauses.setdefault(key, {}).setdefault(bit, []).append(clause)
+
+        for species in self.genus_species.values():
+            species.sort(key=lambda s: s[0])
+
+        self.fields: list[FieldIndex] = [
+            (
+                RangeIndex(key, clauses, self.all_mask)
+                if isinstance(next(iter(clauses.values()))[0][0], RangeFilter)
+                else FieldIndex(key, clauses, self.all_mask)
+            )
+            for key, clauses in field_clauses.items()
+        ]
 
-        return super().can_grow_on(planet)
+    def fingerprint(self, planet: dict) -> tuple[int, ...]:
+        """
+        The filter-equivalence class of a planet: which breakpoint interval, planet class,
+        atmosphere and volcanism it has, as far as the catalog can tell them apart.
+        Planets with the same fingerprint get the same valuation.
+        """
+        if not planet:
+            return ()
+        return tuple(field.code(planet) for field in self.fields)
 
+    def eligible(self, planet: dict) -> int:
+        """
+        Bitset of all catalog entries that can grow on the planet.
+        Like get_value_range, an empty planet description does not filter anything.
+        """
+        mask: int = self.all_mask
+        if not planet:
+            return mask
+        for field in self.fields:
+            mask &= field.mask(planet)
+            if not mask:
+                break
+        return mask
+
+    @staticmethod
+    def worth_range(species: list[tuple[float, int]], mask: int) -> tuple[float, float]:
+        found: list[float] = [worth for worth, bit in species if mask & bit]
+        if not found:
+            return 0.0, 0.0
+        return found[0], found[-1]
+
+    def value_range(self, genus_name: str, planet: dict) -> tuple[float, float]:
+        if genus_name not in self.genus_species:
+            return 1.0, 999.0
+        return self.worth_range(self.genus_species[genus_name], self.eligible(planet))
+
+    def genus_ranges(self, planet: dict) -> dict[str, tuple[float, float]]:
+        """Value range of every known genus on the given planet; (0, 0) if it can not grow there"""
+        mask: int = self.eligible(planet)
+        return {
+            genus: self.worth_range(species, mask)
+            for genus, species in self.genus_species.items()
+        }
+
+
+class SpeciesIndex:
+    """
+    Hash lookups into a species catalog, by display name, genus name or journal ($Codex_Ent_...) symbol,
+    with interned integer ids: every distinct species and genus gets a small id (-1: unknown).
+    """
+    def __init__(self, catalog: list[Biological], codex: dict[str, tuple[str, list[str]]]):
+        self.catalog: list[Biological] = catalog
+        self.size: int = len(catalog)
+        self.genera: list[str] = []
+        self.genus_ids: dict[str, int] = {}
+        # first catalog entry per species, as get_bio_for_species used to return it
+        self.species: list[Biological] = []
+        self.species_ids: dict[str, int] = {}
+        self.species_genus: list[int] = []
+
+        for bio in catalog:
+            if bio.category not in self.genus_ids:
+                self.genus_ids[bio.category] = len(self.genera)
+                self.genera.append(bio.category)
+            if bio.display_name() not in self.species_ids:
+                self.species_ids[bio.display_name()] = len(self.species)
+                self.species.append(bio)
+                self.species_genus.append(self.genus_ids[bio.category])
+
+        # keyed by the symbol without variant, see codex_key()
+        self.codex_ids: dict[str, int] = {}
+        self.codex_genus_ids: dict[str, int] = {}
+        for genus, (stem, names) in codex.items():
+            if genus in self.genus_ids:
+                self.codex_genus_ids[f'{stem}_Genus'] = self.genus_ids[genus]
+            for number, name in enumerate(names, start=1):
+                if f'{genus} {name}' in self.species_ids:
+                    self.codex_ids[f'{stem}_{number:02d}'] = self.species_ids[f'{genus} {name}']
+
+    @staticmethod
+    def codex_key(symbol: str) -> str:
+        """
+        "$Codex_Ent_Conchas_04_Polonium_Name;" -> "Conchas_04", "$Codex_Ent_Conchas_Genus_Name;" -> "Conchas_Genus"
+        """
+        if not symbol.startswith('$Codex_Ent_') or not symbol.endswith('_Name;'):
+            return ''
+        return '_'.join(symbol[len('$Codex_Ent_'):-len('_Name;')].split('_')[:2])
+
+    def resolve_species(self, symbol: str, name: str) -> int:
+        """Species id by journal symbol, or by (English) display name if the symbol is not known"""
+        key: str = self.codex_key(symbol)
+        if key in self.codex_ids:
+            return self.codex_ids[key]
+        return self.species_ids.get(name, -1)
 
-class Clypeus(Biological):
+    def resolve_genus(self, symbol: str, name: str) -> int:
+        key: str = self.codex_key(symbol)
+        if key in self.codex_genus_ids:
+            return self.codex_genus_ids[key]
+        return self.genus_ids.get(name, -1)
+
+
+class CompiledCatalog:
     """
-    Has a colony distance of 150m.
-    They are only found on Rocky or High Metal Content worlds that have
-    a mean temperature superior to 190K,
-    water or carbon dioxide atmosphere,
-    and a maximum gravity of 0.27.
+    Everything built from species.json: the catalog entries and both indexes.
+    This is what gets cached on disk, so that a startup is a single read of the cache file.
     """
-    def __init__(self, name: str, net_worth_millions: float, filters: list = ()):
-        super().__init__('Clypeus', name, net_worth_millions, filters)
-        self.planet1: Filter = Planet('Rocky')
-        self.planet2: Filter = Planet('High metal content')
-        self.temperature: Filter = Temperature(190,999)
-        self.gravity: Filter = Gravity(0, 0.27)
-        self.atmosphere1: Filter = Atmosphere("Water")
-        self.atmosphere2: Filter = Atmosphere("CarbonDioxide")
+    def __init__(self, bios: list[Biological], codex: dict[str, tuple[str, list[str]]]):
+        self.bios: list[Biological] = bios
+        self.species: SpeciesIndex = SpeciesIndex(bios, codex)
+        self.eligibility: EligibilityIndex = EligibilityIndex(bios)
 
-    def can_grow_on(self, planet: dict) -> bool:
-        if not self.gravity.accepts(planet):
-            return False
-        if not self.temperature.accepts(planet):
-            return False
-        if not self.planet1.accepts(planet) and not self.planet2.accepts(planet):
-            return False
-        if not self.atmosphere1.accepts(planet) and not self.atmosphere2.accepts(planet):
-            return False
-
-        return super().can_grow_on(planet)
-
-
-all_bios: list[Biological] = [
-    Aleoida('Arcus', 7.3, [Atmosphere('CarbonDioxide'), Temperature(175, 180)]),
-    Aleoida('Coronamus', 6.3, [Atmosphere('CarbonDioxide'), Temperature(180, 190)]),
-    Aleoida('Gravis', 12.9, [Atmosphere('CarbonDioxide'), Temperature(190, 195)]),
-    Aleoida('Laminiae', 3.4, [Atmosphere('Ammonia')]),
-    Aleoida('Spica', 3.4, [Atmosphere('Ammonia')]),
-
-    Biological('Bacterium', 'Nebulus', 9.1, [Atmosphere('Helium'), Volcanism('None') ]),
-    Biological('Bacterium', 'Acies', 1.0, [Atmosphere('Neon'), Volcanism('None')]),
-    Biological('Bacterium', 'Acies', 1.0, [Atmosphere('Neon'), Volcanism('nitrogen')]),
-    Biological('Bacterium', 'Omentum', 4.6, [Atmosphere('Neon'), Volcanism('nitrogen')]),
-    Biological('Bacterium', 'Omentum', 4.6, [Atmosphere('Neon'), Volcanism('ammonia')]),
-    Biological('Bacterium', 'Scopulum', 8.6, [Atmosphere('Neon'), Volcanism('carbon')]),
-    Biological('Bacterium', 'Scopulum', 8.6, [Atmosphere('Neon'), Volcanism('methane')]),
-    Biological('Bacterium', 'Verrata', 3.9, [Atmosphere('Neon'), Volcanism('water')]),
-    Biological('Bacterium', 'Bullaris', 1.1, [Atmosphere('Methane'), Volcanism('None')]),
-    Biological('Bacterium', 'Vesicula', 1.0, [Atmosphere('Argon'), Volcanism('None')]),
-    Biological('Bacterium', 'Informem', 8.4, [Atmosphere('Nitrogen'), Volcanism('None')]),
-    Biological('Bacterium', 'Volu', 7.7, [Atmosphere('Oxygen'), Volcanism('None')]),
-    Biological('Bacterium', 'Alcyoneum', 1.7, [Atmosphere('Ammonia'), Volcanism('None')]),
-    Biological('Bacterium', 'Aurasus', 1.0, [Atmosphere('CarbonDioxide'), Volcanism('None')]),
-    Biological('Bacterium', 'Cerbrus', 1.7, [Atmosphere('Water'), Volcanism('None')]),
-    Biological('Bacterium', 'Cerbrus', 1.7, [Atmosphere('CarbonDioxide'), Volcanism('None')]),
-    Biological('Bacterium', 'Tela', 1.9, [Volcanism('None')]),
-    Biological('Bacterium', 'Tela', 1.9, [Volcanism('helium')]),
-    Biological('Bacterium', 'Tela', 1.9, [Volcanism('iron')]),
-    Biological('Bacterium', 'Tela', 1.9, [Volcanism('silicate')]),
-    Biological('Bacterium', 'Tela', 1.9, [Volcanism('methane')]),
-
-    Biological('Cactoida', 'Cortexum', 3.7, [Atmosphere('CarbonDioxide')]),
-    Biological('Cactoida', 'Lapis', 2.5, [Atmosphere('Ammonia')]),
-    Biological('Cactoida', 'Peperatis', 2.5, [Atmosphere('Ammonia')]),
-    Biological('Cactoida', 'Pullulanta', 3.7, [Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Cactoida', 'Vermis', 16.2, [Atmosphere('Water')]),
-
-    Clypeus('Lacrimam', 8.4),
-    Clypeus('Margaritus', 11.9),
-    Clypeus('Speculumi', 16.2, [Distance(2500,999999)]),
-
-    Biological('Concha', 'Aureolas', 7.8, [Atmosphere('Ammonia')]),
-    Biological('Concha', 'Biconcavis', 16.8, [Atmosphere('Nitrogen')]),
-    Biological('Concha', 'Labiata', 2.4, [Atmosphere('CarbonDioxide')]),
-    Biological('Concha', 'Renibus', 4.6, [Atmosphere('Water'), Temperature(180, 195)]),
-
-
-
-    Biological('Fonticulua', 'Campestris', 1.0, [Atmosphere('Argon')]),
-    Biological('Fonticulua', 'Digitos', 1.8, [Atmosphere('Methane')]),
-    Biological('Fonticulua', 'Fluctus', 16.8, [Atmosphere('Oxygen')]),
-    Biological('Fonticulua', 'Lapida', 3.1, [Atmosphere('Nitrogen')]),
-    Biological('Fonticulua', 'Segmentatus', 19.0, [Atmosphere('Neon')]),
-    Biological('Fonticulua', 'Upupam', 5.7, [Atmosphere('Argon')]),
-
-    Biological('Frutexa', 'Acus', 7.8, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(0, 195)]),
-    Biological('Frutexa', 'Collum', 1.6, [Planet('Rocky'), Atmosphere('SulphurDioxide')]),
-    Biological('Frutexa', 'Fera', 1.6, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(0, 195)]),
-    Biological('Frutexa', 'Flabellum', 1.8, [Planet('Rocky'), Atmosphere('Ammonia')]),
-    Biological('Frutexa', 'Flammasis', 10.3, [Planet('Rocky'), Atmosphere('Ammonia')]),
-    Biological('Frutexa', 'Metallicum', 1.6, [Planet('High metal content'), Atmosphere('Ammonia'), Temperature(0, 195)]),
-    Biological('Frutexa', 'Metallicum', 1.6, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Temperature(0, 195)]),
-    Biological('Frutexa', 'Sponsae', 6.0, [Planet('Rocky'), Atmosphere('Water')]),
-
-    Biological('Fungoida', 'Bullarum', 3.7, [Atmosphere('Argon')]),
-    Biological('Fungoida', 'Gelata', 3.3, [Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Fungoida', 'Gelata', 3.3, [Atmosphere('Water')]),
-    Biological('Fungoida', 'Setisis', 1.7, [Atmosphere('Ammonia')]),
-    Biological('Fungoida', 'Setisis', 1.7, [Atmosphere('Methane')]),
-    Biological('Fungoida', 'Stabitis', 2.7, [Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Fungoida', 'Stabitis', 2.7, [Atmosphere('Water')]),
-
-    Biological('Osseus', 'Cornibus', 1.5, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Osseus', 'Cornibus', 1.5, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Osseus', 'Discus', 12.9, [Planet('Rocky'), Atmosphere('Water')]),
-    Biological('Osseus', 'Discus', 12.9, [Planet('High metal content'), Atmosphere('Water')]),
-    Biological('Osseus', 'Fractus', 4.0, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(180, 195)]),
-    Biological('Osseus', 'Fractus', 4.0, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Temperature(180, 190)]),
-    Biological('Osseus', 'Pellebantus', 9.7, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(190, 195)]),
-    Biological('Osseus', 'Pellebantus', 9.7, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Temperature(190, 195)]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Rocky'), Atmosphere('Methane')]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Rocky'), Atmosphere('Argon')]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Rocky'), Atmosphere('Nitrogen')]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Ice'), Atmosphere('Methane')]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Ice'), Atmosphere('Argon')]),
-    Biological('Osseus', 'Pumice', 3.2, [Planet('Ice'), Atmosphere('Nitrogen')]),
-    Biological('Osseus', 'Spiralis', 2.4, [Planet('Rocky'), Atmosphere('Ammonia')]),
-    Biological('Osseus', 'Spiralis', 2.4, [Planet('High metal content'), Atmosphere('Ammonia')]),
-
-    Biological('Recepta', 'Conditivus', 14.3, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Conditivus', 14.3, [Planet('Icy'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Deltahedronix', 16.2, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Deltahedronix', 16.2, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Umbrux', 12.9, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Umbrux', 12.9, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-    Biological('Recepta', 'Umbrux', 14.3, [Planet('Icy'), Atmosphere('CarbonDioxide'), Gravity(0, 0.27)]),
-
-    Biological('Stratum', 'Araneamus', 2.4, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(165, 999)]),
-    Biological('Stratum', 'Cucumisis', 16.2, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(190, 999)]),
-    Biological('Stratum', 'Cucumisis', 16.2, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(190, 999)]),
-    Biological('Stratum', 'Excutitus', 2.4, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(165, 190)]),
-    Biological('Stratum', 'Excutitus', 2.4, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(165, 190)]),
-    Biological('Stratum', 'Frigus', 2.4, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(190, 999)]),
-    Biological('Stratum', 'Frigus', 2.4, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(190, 999)]),
-    Biological('Stratum', 'Laminamus', 2.8, [Planet('Rocky'), Atmosphere('Ammonia'), Temperature(165, 999)]),
-    Biological('Stratum', 'Limaxus', 1.4, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(165, 999)]),
-    Biological('Stratum', 'Limaxus', 1.4, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(165, 190)]),
-    Biological('Stratum', 'Limaxus', 1.4, [Planet('Rocky'), Atmosphere('SulphurDioxide'), Temperature(165, 999)]),
-    Biological('Stratum', 'Paleas', 1.4, [Planet('Rocky'), Atmosphere('Ammonia'), Temperature(165, 999)]),
-    Biological('Stratum', 'Paleas', 1.4, [Planet('Rocky'), Atmosphere('Water')]),
-    Biological('Stratum', 'Tectonicas', 19.0, [Planet('High metal content'), Temperature(165, 999)]),
-
-    Biological('Tubus', 'Cavas', 11.9, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(160, 190)]),
-    Biological('Tubus', 'Compagibus', 7.8, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(160, 190)]),
-    Biological('Tubus', 'Conifer', 2.4, [Planet('Rocky'), Atmosphere('CarbonDioxide'), Temperature(160, 190)]),
-    Biological('Tubus', 'Rosarium', 2.6, [Planet('Rocky'), Atmosphere('Ammonia'), Temperature(160, 999)]),
-    Biological('Tubus', 'Sororibus', 5.7, [Planet('High metal content'), Atmosphere('Ammonia'), Temperature(160, 190)]),
-    Biological('Tubus', 'Sororibus', 5.7, [Planet('High metal content'), Atmosphere('CarbonDioxide'), Temperature(160, 190)]),
-
-    Biological('Tussock', 'Albata', 3.3, [Atmosphere('CarbonDioxide'), Temperature(175, 180)]),
-    Biological('Tussock', 'Capillum', 7.0, [Atmosphere('Methane')]),
-    Biological('Tussock', 'Capillum', 7.0, [Atmosphere('Argon')]),
-    Biological('Tussock', 'Caputus', 3.5, [Atmosphere('CarbonDioxide'), Temperature(180, 190)]),
-    Biological('Tussock', 'Catena', 1.8, [Atmosphere('Ammonia')]),
-    Biological('Tussock', 'Cultro', 1.8, [Atmosphere('Ammonia')]),
-    Biological('Tussock', 'Divisa', 1.8, [Atmosphere('Ammonia')]),
-    Biological('Tussock', 'Ignis', 1.8, [Atmosphere('CarbonDioxide'), Temperature(160, 170)]),
-    Biological('Tussock', 'Pennata', 5.9, [Atmosphere('CarbonDioxide'), Temperature(145, 155)]),
-    Biological('Tussock', 'Pennatis', 1.0, [Atmosphere('CarbonDioxide'), Temperature(0, 195)]),
-    Biological('Tussock', 'Propagito', 1.0, [Atmosphere('CarbonDioxide'), Temperature(0, 195)]),
-    Biological('Tussock', 'Serrati', 4.5, [Atmosphere('CarbonDioxide'), Temperature(170, 175)]),
-    Biological('Tussock', 'Stigmasis', 19.0, [Atmosphere('SulphurDioxide')]),
-    Biological('Tussock', 'Triticum', 7.8, [Atmosphere('CarbonDioxide'), Temperature(190, 195)]),
-    Biological('Tussock', 'Ventusa', 3.3, [Atmosphere('CarbonDioxide'), Temperature(155, 160)]),
-    Biological('Tussock', 'Virgam', 14.3, [Atmosphere('Water')]),
-
-]
 
+catalog_path: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'species.json')
+# compiled catalogs are cached next to the bytecode, named by the content hash of the catalog file
+cache_dir: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+# part of the hash: unpickling rebuilds the compiled objects with the current classes, so a change to them
+# (e.g. of Gravity.one_g or the index internals) has to invalidate the cache files as well
+code_path: str = os.path.abspath(__file__)
 
-def get_bio_for_species(name: str) -> Biological:
-    for b in all_bios:
-        if b.display_name() == name:
-            return b
-    return Biological(name, '?', 999.0)
+
+def compile_catalog(path: str, cache_directory: str|None) -> CompiledCatalog:
+    """
+    Load and compile the catalog file, or take the compiled form from the cache if the file did not change
+    """
+    with open(path, 'rb') as f:
+        raw: bytes = f.read()
+    with open(code_path, 'rb') as f:
+        code: bytes = f.read()
+    digest: str = hashlib.sha256(raw + b'/' + code).hexdigest()[:16]
+    cache_path: str|None = (
+        os.path.join(cache_directory, f'species-{digest}.pickle') if cache_directory else None
+    )
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # unreadable (e.g. written by another version): compile again
+            pass
+
+    compiled: CompiledCatalog = CompiledCatalog(*load_catalog(json.loads(raw)))
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_directory, exist_ok=True)
+            for name in os.listdir(cache_directory):
+                if name.startswith('species-') and name.endswith('.pickle'):
+                    os.remove(os.path.join(cache_directory, name))
+            with open(cache_path + '.tmp', 'wb') as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError:
+            # read-only plugin directory: compile on every start then
+            pass
+    return compiled
+
+
+compiled_catalog: CompiledCatalog|None = None
+
+
+def species_catalog() -> CompiledCatalog:
+    """
+    Return the compiled species catalog, loading it on first use
+    """
+    global compiled_catalog
+    if compiled_catalog is None:
+        compiled_catalog = compile_catalog(catalog_path, cache_dir)
+    return compiled_catalog
+
+
+def species_index() -> SpeciesIndex:
+    return species_catalog().species
+
+
+def eligibility_index() -> EligibilityIndex:
+    return species_catalog().eligibility
+
+
+def test_species_index() -> None:
+    index: SpeciesIndex = species_index()
+    for bio in species_catalog().bios:
+        species_id: int = index.species_ids[bio.display_name()]
+        assert index.species[species_id].display_name() == bio.display_name()
+        assert index.genera[index.species_genus[species_id]] == bio.category
+    # every species in the catalog has its journal symbol
+    assert len(index.codex_ids) == len(index.species)
+    assert len(index.codex_genus_ids) == len(index.genera)
+
+    biconcavis: int = index.resolve_species("$Codex_Ent_Conchas_04_Polonium_Name;", "Concha Biconcavis - Rot")
+    assert index.species[biconcavis].display_name() == "Concha Biconcavis"
+    assert index.resolve_species("$Codex_Ent_Bacterial_04_Name;", "") == index.species_ids["Bacterium Acies"]
+    assert index.resolve_genus("$Codex_Ent_Shrubs_Genus_Name;", "Frutexa") == index.genus_ids["Frutexa"]
+    assert index.resolve_genus("", "Tubus") == index.genus_ids["Tubus"]
+    assert index.resolve_species("$Codex_Ent_Standard_Ammonia_Worlds_Name;", "Ammonia world") == -1
+
+
+def test_eligibility_index() -> None:
+    index: EligibilityIndex = eligibility_index()
+    planets: list[dict] = [
+        {},
+        {"PlanetClass": "Rocky body"},
+        {"PlanetClass": "Icy body", "AtmosphereComposition": [{"Name": "Neon", "Percent": 100.0}], "Volcanism": ""},
+    ]
+    for temperature in (140, 165, 175, 189.9, 190, 194.5, 300):
+        for gravity in (0.1, 2.648, 2.649, 9.8):
+            for gas in ("CarbonDioxide", "Water", "Ammonia", "Argon"):
+                for planet_class in ("Rocky body", "High metal content body", "Icy body"):
+                    planets.append({
+                        "PlanetClass": planet_class,
+                        "AtmosphereComposition": [{"Name": gas, "Percent": 90.0}, {"Name": "Nitrogen", "Percent": 10.0}],
+                        "Volcanism": "minor silicate vapour geysers volcanism",
+                        "SurfaceTemperature": temperature,
+                        "SurfaceGravity": gravity,
+                        "Periapsis": temperature * 10,
+                    })
+    for planet in planets:
+        mask: int = index.eligible(planet)
+        for bit, bio in enumerate(species_catalog().bios):
+            assert bool(mask & (1 << bit)) == (not planet or bio.can_grow_on(planet)), (bio.display_name(), planet)
+
+
+def test_catalog_cache(tmp_path, monkeypatch) -> None:
+    first: CompiledCatalog = compile_catalog(catalog_path, str(tmp_path))
+    cached: list[str] = [p.name for p in tmp_path.iterdir()]
+    assert len(cached) == 1 and cached[0].startswith('species-')
+
+    second: CompiledCatalog = compile_catalog(catalog_path, str(tmp_path))
+    assert second is not first and len(second.bios) == len(first.bios)
+    planet: dict = {"PlanetClass": "Rocky body", "SurfaceGravity": 1.0, "SurfaceTemperature": 192.0}
+    assert second.eligibility.genus_ranges(planet) == first.eligibility.genus_ranges(planet)
+    assert second.species.codex_ids == first.species.codex_ids
+
+    # an edited catalog gets a new cache file, replacing the old one
+    edited = tmp_path / 'species.json'
+    with open(catalog_path, encoding='utf-8') as f:
+        data: dict = json.loads(f.read())
+    data['species'].append({"genus": "Tubus", "species": "Novus", "value": 1.5})
+    edited.write_text(json.dumps(data))
+    third: CompiledCatalog = compile_catalog(str(edited), str(tmp_path))
+    assert third.species.species_ids["Tubus Novus"] >= 0
+    assert len([p for p in tmp_path.iterdir() if p.suffix == '.pickle']) == 1
+
+    # so does a change to the code of the compiled classes
+    edited_code = tmp_path / 'biologial.py'
+    with open(code_path, encoding='utf-8') as f:
+        code: str = f.read()
+    edited_code.write_text(code.replace('one_g: float = ', 'one_g: float = 1.0 * '), encoding='utf-8')
+    before: list[str] = [p.name for p in tmp_path.iterdir() if p.suffix == '.pickle']
+    monkeypatch.setattr(f'{__name__}.code_path', str(edited_code))
+    compile_catalog(str(edited), str(tmp_path))
+    after: list[str] = [p.name for p in tmp_path.iterdir() if p.suffix == '.pickle']
+    assert len(after) == 1 and after != before
+
+
+def test_catalog_validation() -> None:
+    def error(data: dict) -> str:
+        try:
+            load_catalog(data)
+        except ValueError as e:
+            return str(e)
+        return ''
+
+    genera: dict = {"Tubus": {"codex": "Tubus", "codex_species": ["Cavas"]}}
+    cavas: dict = {"genus": "Tubus", "species": "Cavas", "value": 11.9}
+    catalog, codex = load_catalog({"genera": genera, "species": [dict(cavas, requires=[
+        {"temperature": [160, 190]}, {"any": [{"planet": "Rocky"}, {"planet": "High metal content"}]}
+    ])]})
+    assert codex == {"Tubus": ("Tubus", ["Cavas"])}
+    assert catalog[0].can_grow_on({"PlanetClass": "High metal content body", "SurfaceTemperature": 170})
+    assert not catalog[0].can_grow_on({"PlanetClass": "Icy body", "SurfaceTemperature": 170})
+
+    assert 'unknown genus' in error({"genera": genera, "species": [cavas, dict(cavas, genus="Tubbus")]})
+    assert 'unknown filter' in error({"genera": genera, "species": [dict(cavas, requires=[{"colour": "red"}])]})
+    assert 'range' in error({"genera": genera, "species": [dict(cavas, requires=[{"temperature": [190, 160]}])]})
+    assert 'several Scan fields' in error({"genera": genera, "species": [dict(cavas, requires=[
+        {"any": [{"planet": "Rocky"}, {"atmosphere": "Water"}]}
+    ])]})
+    assert 'positive "value"' in error({"genera": genera, "species": [dict(cavas, value="11.9")]})
+    assert 'no catalog entry' in error({"genera": genera, "species": []})
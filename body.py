@@ -1,13 +1,67 @@
+import sys
+
 from scanresult import ScanResult
 from helpers import get_value_range_anonymous
 
 
-class Body(dict):
+class Body:
+    """
+    Compact projection of a "Scan" journal event, keeping only the fields needed for valuation and display.
+    Strings are interned, and the atmosphere is kept as a set of gas names.
+
+    Read access works like on the event dict (body['PlanetClass'], 'Volcanism' in body),
+    so the biological filters accept both; to_dict() gives the persisted (event-like) form.
+    """
+    fields: tuple[str, ...] = (
+        'BodyID', 'BodyName', 'BodyClass', 'SystemAddress', 'PlanetClass', 'TerraformState',
+        'AtmosphereComposition', 'Volcanism', 'SurfaceTemperature', 'SurfaceGravity', 'Periapsis',
+        'WasDiscovered', 'WasMapped'
+    )
+    field_set: frozenset[str] = frozenset(fields)
+    __slots__ = fields + ('value_min', 'value_max')
+
     def __init__(self, src: dict):
-        super().__init__(src)
+        for key in Body.fields:
+            if key not in src:
+                continue
+            value: any = src[key]
+            if key == 'AtmosphereComposition' and not isinstance(value, frozenset):
+                value = frozenset(sys.intern(x["Name"]) for x in value)
+            elif isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
 
         if 'BodyClass' not in self:
-            self['BodyClass'] = 'unknown'
+            self.BodyClass = 'unknown'
+
+        # value range including bio signals; kept up to date by update_value() whenever
+        # the body or its signals change, so the redraw does not need to recalculate it
+        self.value_min: float = 0.0
+        self.value_max: float = 0.0
+        self.update_value([])
+
+    def __contains__(self, key: str) -> bool:
+        return key in Body.field_set and hasattr(self, key)
+
+    def __getitem__(self, key: str) -> any:
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: any = None) -> any:
+        return getattr(self, key) if key in self else default
+
+    def keys(self) -> list[str]:
+        return [key for key in Body.fields if hasattr(self, key)]
+
+    def to_dict(self) -> dict:
+        res: dict = {key: getattr(self, key) for key in self.keys()}
+        if 'AtmosphereComposition' in res:
+            res['AtmosphereComposition'] = [{"Name": gas} for gas in sorted(res['AtmosphereComposition'])]
+        return res
+
+    def __repr__(self) -> str:
+        return f'Body({self.to_dict()})'
 
     def pget(self, name: str) -> str:
         if name not in self:
@@ -68,25 +122,39 @@ class Body(dict):
             return 'forest green'
         return 'blue' if self.is_water() else 'black'
 
-    def value_range_str(self, bios: list[ScanResult]) -> str:
+    def value_range(self, bios: list[ScanResult]) -> tuple[float, float]:
         min_sum: float = self.discovery_value()
         max_sum: float = min_sum
         # first finder's fee
         factor: float = 1 if self.was_mapped() else 5
 
         for b in bios:
-            x,y = b.get_value_range()
-            if x == -1:
-                # generic "X signatures" .. recalculate
-                # TODO: should not be done in the redraw part
-                x,y = get_value_range_anonymous(self, b.signature_count)
-
+            x,y = self.scan_value_range(b)
             min_sum += x * factor
             max_sum += y * factor
+        return min_sum, max_sum
+
+    def scan_value_range(self, scan: ScanResult) -> tuple[float, float]:
+        """Base value range of one scan result on this body, without first finder's bonus"""
+        x,y = scan.get_value_range()
+        if x == -1:
+            # generic "X signatures" .. recalculate
+            x,y = get_value_range_anonymous(self, scan.signature_count)
+        return x, y
 
-        if min_sum == max_sum:
-            return f'[{min_sum:.0f} M]'
-        return f'[{min_sum:.0f}-{max_sum:.0f} M]'
+    def update_value(self, bios: list[ScanResult]) -> None:
+        self.value_min, self.value_max = self.value_range(bios)
+
+    def value_range_str(self, bios: list[ScanResult]|None = None) -> str:
+        """
+        Display string of the stored value range; if <bios> is given, re-evaluate with those first
+        """
+        if bios is not None:
+            self.update_value(bios)
+
+        if self.value_min == self.value_max:
+            return f'[{self.value_min:.0f} M]'
+        return f'[{self.value_min:.0f}-{self.value_max:.0f} M]'
 
     def discovery_value(self) -> float:
         discovery_bonus: float = 1.0 if self.was_mapped() else 2.88
@@ -121,3 +189,23 @@ def test_value() -> None:
         <
         Body({"PlanetClass": "Earthlike body", "WasMapped": False}).discovery_value()
     )
+
+
+def test_projection() -> None:
+    scan: dict = {
+        "event": "Scan", "BodyName": "Smoje DF-Z d10 5 a", "BodyID": 7, "SystemAddress": 354494270091,
+        "PlanetClass": "Rocky body", "AtmosphereComposition": [
+            {"Name": "CarbonDioxide", "Percent": 99.009911}, {"Name": "SulphurDioxide", "Percent": 0.990099}
+        ],
+        "Volcanism": "", "SurfaceGravity": 2.290507, "SurfaceTemperature": 194.572083,
+        "Materials": [{"Name": "iron", "Percent": 20.540316}], "Periapsis": 1.637797, "WasMapped": False
+    }
+    body: Body = Body(scan)
+    assert "Materials" not in body and "Periapsis" in body
+    assert body["AtmosphereComposition"] == frozenset({"CarbonDioxide", "SulphurDioxide"})
+    assert body.to_dict()["AtmosphereComposition"] == [{"Name": "CarbonDioxide"}, {"Name": "SulphurDioxide"}]
+
+    # round trip through the persisted form
+    copy: Body = Body(body.to_dict())
+    assert copy.to_dict() == body.to_dict()
+    assert copy.value_range_str() == body.value_range_str()
@@ -1,81 +1,367 @@
-import tkinter
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Iterable, Iterator
 from logging import Logger
-from json import loads, dumps
-from config import AbstractConfig
+try:
+    from config import AbstractConfig
+except ImportError:
+    # running outside EDMC (tests, replay tool): any object with the config getters/setters will do
+    AbstractConfig = any
+try:
+    import tkinter
+except ImportError:
+    # headless box without python3-tk (follow.py, replay tool): no frame, but view_rows still needs the constants
+    tkinter = SimpleNamespace(Widget=any, Frame=any, LEFT='left', RIGHT='right')
 
 
 import helpers
 from scanresult import ScanResult, ScanFromOrbit, ScanWithShipOrSuit
 from body import Body
+from gridrenderer import GridRenderer
+from persistence import StatePersistence, copy_state
+from statelog import StateLog
+from memoryconfig import MemoryConfig
+from instrumentation import Instrumentation, MemoryTracker, SlowEventProfiler
+from valuationworker import ValuationWorker, ViewSnapshot
 
 tk = tkinter
 
 
 class ExplorationHelper:
-    def __init__(self, logger: Logger, config: AbstractConfig, tk_impl: any = None):
+    # journal events arriving within this time are coalesced into one redraw
+    redraw_delay_ms: int = 100
+    # changes are written to the config at most this often (and on plugin_stop)
+    persist_delay_ms: int = 5000
+    # journal events handled by apply_event; others do not even trigger loading the state
+    handled_events: frozenset[str] = frozenset({
+        'FSDJump', 'Location', 'CarrierJump', 'SAASignalsFound', 'FSSBodySignals', 'Scan', 'CodexEntry', 'ScanOrganic'
+    })
+
+    def __init__(
+            self, logger: Logger, config: AbstractConfig, tk_impl: any = None,
+            redraw_delay_ms: int|None = None, state_dir: str|None = None, history_path: str|None = None,
+            instrumentation: Instrumentation|None = None, profiler: SlowEventProfiler|None = None,
+            memory: MemoryTracker|None = None, metrics: 'MetricsExporter|None' = None
+    ):
         global tk
         self.logger: Logger = logger
+        # latency per handled event type, and of the valuation / persistence / rendering work
+        self.instrumentation: Instrumentation = (
+            instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        )
+        # stack samples of slow events, see SlowEventProfiler
+        self.profiler: SlowEventProfiler|None = profiler
+        # memory accounting on system changes and every memory.interval seconds, see MemoryTracker
+        self.memory: MemoryTracker|None = memory
+        # Prometheus metrics, rendered every metrics.interval seconds on the event thread
+        self.metrics: 'MetricsExporter|None' = metrics
         self.config: AbstractConfig = config
-        self.current_system_name: str = self.load_system_name()
-        self.system_bodies: dict[int, Body] = self.load_bodies()
-        self.bio_signs: dict[int, list[ScanResult]] = self.load_biosigns()
         if tk_impl is not None:
             tk = tk_impl
         self.tk_frame: tk.Frame|None = None
+        self.renderer: GridRenderer|None = None
+        if redraw_delay_ms is not None:
+            self.redraw_delay_ms = redraw_delay_ms
+        self.redraw_pending: bool = False
+        self.redraw_scheduled: bool = False
+        self.persist_scheduled: bool = False
+        # with a worker thread, events are handled there, and the tk side only renders its snapshots
+        self.worker: ValuationWorker|None = None
+        self.rendered_version: int = 0
+        # poll_snapshot is scheduled; it stops while the worker is idle, journal_event starts it again
+        self.polling: bool = False
+        # EDMC config values written by the tk thread on behalf of the worker, see write_config
+        self.config_written: dict[str, any] = {}
+        # tk widgets in the frame, counted by poll_snapshot for the memory diagnostics (tk is only asked on its thread)
+        self.widget_count: int = 0
+        self.pooled_labels: int = 0
+        # inside batch(): bodies to re-evaluate at commit; None outside of a batch
+        self.batch_changes: set[int]|None = None
+
+        # previously visited systems go to the history store, only the current one is kept in memory
+        self.history_path: str|None = history_path
+        self.history: 'HistoryStore|None' = None
+        self.current_system_address: int|None = None
+        self.current_region: str|None = None
+
+        # with a state directory, the state is kept in a local snapshot plus event log instead of the EDMC config
+        self.state_log: StateLog|None = StateLog(state_dir) if state_dir else None
+        # set by a change of system: the log only holds records of the previous one then, so compact it
+        self.snapshot_pending: bool = False
+        self.persistence: StatePersistence = StatePersistence(config)
+
+        # the stored state is only loaded when needed (see ensure_loaded), to keep EDMC startup fast
+        self.loaded: bool = False
+        self.current_system_name: str = ""
+        self.system_bodies: dict[int, Body] = {}
+        self.bio_signs: dict[int, list[ScanResult]] = {}
+
+    def ensure_loaded(self) -> None:
+        """
+        Load the stored state, unless done already: on the first handled journal event, or when the frame is created
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        if self.history_path:
+            # sqlite3 is imported with it, which is not needed before this
+            from history import HistoryStore
+
+            self.history = HistoryStore(self.history_path)
+
+        tail: list[dict] = []
+        if self.state_log is not None:
+            snapshot, tail = self.state_log.load()
+            # first start with a state log: take over what is stored in the config
+            self.persistence = StatePersistence(
+                MemoryConfig(snapshot if snapshot is not None else copy_state(self.config))
+            )
+
+        self.current_system_name = self.load_system_name()
+        self.current_system_address = self.persistence.load_system_address()
+        self.system_bodies = self.load_bodies()
+        self.bio_signs = self.load_biosigns()
+        for entry in tail:
+            self.apply_event(entry)
 
     def load_system_name(self) -> str:
-        return self.config.get_str("explorationhelper.current_system", default="")
+        return self.persistence.load_system_name()
 
     def load_bodies(self) -> dict[int, Body]:
         res = {}
-        for v in self.config.get_list("explorationhelper.known_bodies", default=[]):
-            b: Body = Body(loads(v))
-            self.logger.info(f"Loaded body {b.id()} worth {b.discovery_value()}")
+        for v in self.persistence.load_bodies():
+            b: Body = Body(v)
+            self.logger.debug(f"Loaded body {b.id()} worth {b.discovery_value()}")
             res[b.id()] = b
         return res
 
     def load_biosigns(self) -> dict[int, list[ScanResult]]:
-        return helpers.str_to_scans(
-            self.config.get_list("explorationhelper.known_bios", default=[]),
+        res: dict[int, list[ScanResult]] = helpers.str_to_scans(
+            self.persistence.load_bios(),
             self.system_bodies
         )
+        for body_id, body in self.system_bodies.items():
+            body.update_value(res.get(body_id, []))
+        return res
 
     def override_config(self, config_mock: any) -> None:
         self.config = config_mock
+        if self.state_log is None and self.worker is None:
+            # with a worker, the persistence keeps its copy, which write_config transfers to this config
+            self.persistence.config = config_mock
+
+    def start_worker(self) -> None:
+        """
+        Move the event handling to a background thread; call before frame_init and the first event.
+        Without a state log, the worker persists into a copy of the stored state, and the tk thread
+        writes what changed in it to the EDMC config (see write_config).
+        """
+        if self.state_log is None:
+            self.persistence = StatePersistence(MemoryConfig(copy_state(self.config)))
+            self.config_written = dict(self.persistence.config.data)
+        self.worker = ValuationWorker(self)
+        self.worker.start()
 
     def frame_init(self, parent: tk.Widget) -> tk.Frame:
+        if self.worker is None:
+            self.ensure_loaded()
+        else:
+            self.worker.submit(self.ensure_loaded)
         self.tk_frame = tk.Frame(parent)
+        self.renderer = GridRenderer(tk, self.tk_frame)
         self.frame_redraw()
+        if self.worker is not None:
+            self.start_polling()
         return self.tk_frame
 
+    def start_polling(self) -> None:
+        if self.tk_frame is not None and not self.polling:
+            self.polling = True
+            self.tk_frame.after(self.redraw_delay_ms, self.poll_snapshot)
+
+    def poll_snapshot(self) -> None:
+        """
+        Take over the latest snapshot of the worker, if it is new; runs every redraw_delay_ms on the tk thread
+        while the worker has something to do
+        """
+        # asked first: once idle, the worker has published everything already
+        idle: bool = self.worker.idle()
+        snapshot: ViewSnapshot = self.worker.snapshot
+        new: bool = snapshot.version != self.rendered_version
+        if new:
+            self.render_snapshot(snapshot)
+        if self.memory is not None:
+            self.widget_count = len(self.tk_frame.winfo_children())
+            self.pooled_labels = self.count_pooled_labels()
+        if idle and not new:
+            self.polling = False
+            return
+        self.tk_frame.after(self.redraw_delay_ms, self.poll_snapshot)
+
+    def write_config(self, state: dict) -> None:
+        """
+        Write the state persisted by the worker to the EDMC config, on the tk thread.
+        Changed values are new objects, so only the keys the worker wrote since the last time are set.
+        """
+        for key, value in state.items():
+            if value is not self.config_written.get(key):
+                self.config.set(key, value)
+                self.config_written[key] = value
+
     def frame_clear(self) -> None:
+        self.renderer.clear()
         for w in self.tk_frame.winfo_children():
             w.destroy()
 
+    def request_redraw(self) -> None:
+        """
+        Mark the view as outdated. The redraw happens once per burst of journal events,
+        redraw_delay_ms after the first of them, via tk's after() mechanism.
+        With a worker thread, the worker publishes a new snapshot after its current batch instead.
+        """
+        self.redraw_pending = True
+        if self.worker is not None:
+            return
+        if self.tk_frame is None:
+            # nothing to coalesce without a tk main loop
+            self.flush()
+        elif not self.redraw_scheduled:
+            self.redraw_scheduled = True
+            self.tk_frame.after(self.redraw_delay_ms, self.flush)
+
+    def flush(self) -> None:
+        """
+        Redraw right now if anything changed since the last redraw
+        """
+        self.redraw_scheduled = False
+        if self.redraw_pending:
+            self.redraw_pending = False
+            self.frame_redraw()
+
+    def request_persist(self) -> None:
+        """
+        Schedule writing the changed state to the config, at most once per persist_delay_ms.
+        Without a tk main loop, this only happens on persist() / plugin_stop.
+        """
+        if self.state_log is not None or self.worker is not None:
+            # recorded per event, or written behind by the worker
+            return
+        if self.tk_frame is not None and not self.persist_scheduled:
+            self.persist_scheduled = True
+            self.tk_frame.after(self.persist_delay_ms, self.persist)
+
+    def persist(self) -> None:
+        self.persist_scheduled = False
+        if self.persistence.is_dirty(self.current_system_name, self.current_system_address):
+            with self.instrumentation.measure('persistence'):
+                self.persistence.write(
+                    self.current_system_name, self.system_bodies, self.bio_signs, self.current_system_address
+                )
+
+    def snapshot(self) -> None:
+        """
+        Compact the state log: write the full state as new snapshot and start an empty log
+        """
+        self.snapshot_pending = False
+        with self.instrumentation.measure('persistence'):
+            self.persistence.write(
+                self.current_system_name, self.system_bodies, self.bio_signs, self.current_system_address
+            )
+            self.state_log.write_snapshot(self.persistence.config.data)
+
+    def shutdown(self) -> None:
+        """
+        Called from plugin_stop: write whatever is still pending
+        """
+        if self.worker is not None:
+            # handle what is queued, after that the state belongs to this thread again
+            self.worker.stop()
+        if self.profiler is not None:
+            self.profiler.stop()
+        if not self.loaded:
+            # nothing happened, nothing to write
+            if self.memory is not None:
+                self.memory.stop()
+            if self.metrics is not None:
+                self.metrics.stop()
+            return
+        if self.state_log is not None:
+            self.snapshot()
+            self.state_log.close()
+        else:
+            self.persist()
+            if self.worker is not None:
+                self.write_config(self.persistence.config.data)
+        if self.history is not None:
+            self.archive_system()
+            self.history.close()
+        if self.instrumentation.enabled and self.instrumentation.log_enabled:
+            self.instrumentation.log(self.logger)
+        if self.memory is not None:
+            self.memory_checkpoint('shutdown')
+            self.memory.stop()
+        if self.metrics is not None:
+            self.metrics.update(self)
+            self.metrics.stop()
+
+    def system_address(self) -> int|None:
+        if self.current_system_address is not None:
+            return self.current_system_address
+        # not known after a restart, but all scanned bodies have it
+        for body in self.system_bodies.values():
+            if 'SystemAddress' in body:
+                return body['SystemAddress']
+        return None
+
+    def archive_system(self) -> None:
+        """
+        Store the current system in the history store
+        """
+        if self.history is None or not self.system_bodies:
+            return
+        # within a batch, the stored values may still be outdated
+        self.update_changed_values()
+        system_address: int|None = self.system_address()
+        if system_address is None:
+            self.logger.warning(f'Can not archive {self.current_system_name}: system address unknown')
+            return
+        self.history.archive(
+            system_address, self.current_system_name, self.current_region, self.system_bodies, self.bio_signs
+        )
+
     def frame_redraw(self) -> None:
         """
         Refresh the tk window contents, which is a table/grid of planets with their
         properties related to exobiology
         """
-        self.frame_clear()
-        row: int = 0
-
-        # TODO: store stuff to config
-        self.config.set("explorationhelper.current_system", self.current_system_name)
-        self.config.set(
-            "explorationhelper.known_bodies",
-            [
-                dumps(b)
-                for b in self.system_bodies.values()
-            ]
-        )
-        self.config.set(
-            "explorationhelper.known_bios",
-            [
-                helpers.scans_to_str(body_id, scan_list)
-                for body_id, scan_list in self.bio_signs.items()
-            ]
-        )
+        if self.renderer is None:
+            return
+        if self.worker is None:
+            with self.instrumentation.measure('rendering'):
+                self.renderer.render(self.view_rows())
+        else:
+            self.render_snapshot(self.worker.snapshot)
+
+    def render_snapshot(self, snapshot: ViewSnapshot) -> None:
+        """
+        Render a snapshot published by the worker, and write the state it persisted
+        """
+        self.rendered_version = snapshot.version
+        if snapshot.config is not None:
+            self.write_config(snapshot.config)
+        start: float = time.perf_counter()
+        self.renderer.render(list(snapshot.rows))
+        if self.instrumentation.enabled:
+            # the instrumentation belongs to the worker thread, so the duration is handed over through its queue
+            seconds: float = time.perf_counter() - start
+            self.worker.submit(lambda: self.instrumentation.add('rendering', seconds))
+
+    def view_rows(self) -> list[tuple[int, list[dict]]]:
+        """
+        Build the table contents as plain data: per listed body, its id and the label properties per column
+        """
+        rows: list[tuple[int, list[dict]]] = []
 
         # TODO: sort by distance from entry point ?
         #       sorting by Body-ID seems to be ok.
@@ -98,27 +384,20 @@ class ExplorationHelper:
                 
                 x/y/z: symbols for already mapped, $$ > 10M, ...           
             """
-            body: Body = self.system_bodies[body_id]
             name_props: dict = {
                 "text": body.name().removeprefix(self.current_system_name),
                 "justify": tk.RIGHT,
                 "fg": body.display_color()
             }
             symbol_props: dict = {
-                "text": body.value_range_str(result_list),
+                "text": body.value_range_str(),
                 "justify": tk.RIGHT
             }
             if not body.was_mapped():
                 name_props['background'] = 'gold'
                 symbol_props['background'] = 'gold'
 
-            p_name = tk.Label(self.tk_frame, **name_props)
-            p_name.grid(row=row, column=0, sticky=tk.W)
-
-            p_symbol = tk.Label(self.tk_frame, **symbol_props)
-            p_symbol.grid(row=row, column=1, sticky=tk.W)
-
-            col: int = 2
+            cells: list[dict] = [name_props, symbol_props]
             for scan_result in result_list:
                 color: str = scan_result.get_display_color()
                 text: str = scan_result.get_display_string()
@@ -129,23 +408,248 @@ class ExplorationHelper:
                 }
                 if scan_result.is_done():
                     label_props['font'] = "-weight bold"
+                cells.append(label_props)
+            rows.append((body_id, cells))
+        return rows
 
-                p_desc = tk.Label(self.tk_frame, **label_props)
-                p_desc.grid(row=row, column=col, sticky=tk.W)
-                col += 1
-            row += 1
+    def update_value(self, body_id: int) -> None:
+        """
+        Re-evaluate a body after it or its bio signals changed.
+        Done once on ingest, so that frame_redraw only needs to read the stored values.
+        """
+        if body_id in self.system_bodies:
+            with self.instrumentation.measure('valuation'):
+                self.system_bodies[body_id].update_value(self.bio_signs.get(body_id, []))
+
+    def update_changed_values(self) -> None:
+        """Re-evaluate the bodies changed so far within the current batch"""
+        if self.batch_changes:
+            for body_id in sorted(self.batch_changes):
+                self.update_value(body_id)
+            self.batch_changes.clear()
+
+    def body_changed(self, body_id: int) -> None:
+        """
+        Bookkeeping after a register_* handler changed a body or its bio signals:
+        re-evaluate it, and schedule persisting and redrawing.
+        Within a batch, all of that is postponed to its commit.
+        """
+        self.persistence.changed(body_id)
+        if self.batch_changes is not None:
+            self.batch_changes.add(body_id)
+            self.redraw_pending = True
+            return
+        self.update_value(body_id)
+        self.request_persist()
+        self.request_redraw()
 
     def clear_all(self) -> None:
+        for body_id in set(self.system_bodies) | set(self.bio_signs):
+            self.persistence.changed(body_id)
         self.system_bodies.clear()
         self.bio_signs.clear()
-        self.frame_redraw()
+        if self.batch_changes is not None:
+            self.batch_changes.clear()
+            self.redraw_pending = True
+            return
+        self.request_persist()
+        self.request_redraw()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Apply several journal events as one transaction:
+            with helper.batch():
+                for entry in entries:
+                    helper.journal_event(entry)
+        Changed bodies are re-evaluated once each at the end, followed by one persist and one redraw.
+        Nested batches join the outer one. With a worker thread, use ingest() instead.
+        """
+        if self.batch_changes is not None:
+            yield
+            return
+        self.batch_changes = set()
+        try:
+            yield
+        finally:
+            self.update_changed_values()
+            self.batch_changes = None
+            if self.redraw_pending:
+                if self.state_log is None and self.worker is None:
+                    self.persist()
+                if self.worker is None:
+                    self.flush()
+
+    def ingest(self, entries: Iterable[dict]) -> None:
+        """
+        Handle a bulk of journal events (e.g. a replayed journal, or EDMC catching up at startup) in one batch.
+        With a worker thread, they are queued as a single task, and published as one snapshot.
+        """
+        if self.worker is not None:
+            entries = list(entries)
+            self.worker.submit(lambda: self.process_batch(entries))
+            self.start_polling()
+        else:
+            self.process_batch(entries)
+
+    def process_batch(self, entries: Iterable[dict]) -> None:
+        with self.batch():
+            for entry in entries:
+                self.process_event(entry)
+
+    def journal_event(self, entry: dict) -> None:
+        """
+        Entry point for all journal events (see load.journal_entry).
+        With a worker thread, relevant events are only queued here.
+        """
+        if self.worker is None:
+            self.process_event(entry)
+        elif entry['event'] in self.handled_events:
+            self.worker.submit(lambda: self.process_event(entry))
+            self.start_polling()
 
-    def register_system(self, entry:dict) -> None:
+    def process_event(self, entry: dict) -> None:
+        """
+        Handle a journal event. Events changing the state are recorded in the state log, if there is one;
+        a jump to another system empties the state, which makes it a good time for a snapshot.
+        """
+        event: str = entry['event']
+        handled: bool = event in self.handled_events
+        if self.profiler is not None:
+            self.profiler.start(event)
+        start: float = time.perf_counter()
+        changed: bool = self.apply_event(entry)
+        if changed and self.state_log is not None:
+            self.record_event(entry)
+        seconds: float = time.perf_counter() - start
+
+        if self.profiler is not None:
+            self.profiler.finish(event, len(self.system_bodies))
+        if handled and self.instrumentation.enabled:
+            self.instrumentation.add(f'event.{event}', seconds)
+            self.instrumentation.log_periodically(self.logger)
+        if handled and self.memory is not None and self.memory.due():
+            self.memory_checkpoint('interval')
+        if handled and self.metrics is not None and self.metrics.due():
+            self.metrics.update(self)
+
+    def memory_roots(self) -> dict[str, any]:
+        """What the MemoryTracker accounts for; only plain data, tk objects are counted instead"""
+        from biologial import species_catalog
+
+        roots: dict[str, any] = {
+            'catalog': species_catalog(),
+            'valuation cache': helpers.valuation_cache.entries,
+            'system_bodies': self.system_bodies,
+            'bio_signs': self.bio_signs,
+        }
+        if self.worker is not None:
+            roots['view'] = self.worker.snapshot
+        elif self.renderer is not None:
+            roots['view'] = [self.renderer.rows] + [slot.props for row in self.renderer.slots for slot in row if slot]
+        return roots
+
+    def memory_checkpoint(self, reason: str) -> None:
+        lines: list[str] = self.memory.checkpoint(reason, self.memory_roots())
+        counts: list[str] = [
+            f'{len(self.system_bodies)} bodies',
+            f'{sum(len(scans) for scans in self.bio_signs.values())} scan results',
+            f'{len(helpers.valuation_cache)} cached valuations',
+        ]
+        if self.renderer is not None:
+            if self.worker is None:
+                counts.append(f'{self.count_pooled_labels()} pooled labels')
+                counts.append(f'{len(self.tk_frame.winfo_children())} widgets')
+            else:
+                # tk may only be asked from its own thread: as of its last poll_snapshot
+                counts.append(f'{self.pooled_labels} pooled labels')
+                counts.append(f'{self.widget_count} widgets')
+        for line in lines + ['memory counts: ' + ', '.join(counts)]:
+            self.logger.info(line)
+
+    def count_pooled_labels(self) -> int:
+        return sum(1 for row in self.renderer.slots for slot in row if slot is not None)
+
+    def record_event(self, entry: dict) -> None:
+        if entry['event'] == 'Scan':
+            # the compact body projection is all a replay needs
+            entry = dict(self.system_bodies[entry['BodyID']].to_dict(), event='Scan')
+        with self.instrumentation.measure('persistence'):
+            self.state_log.append(entry)
+        if self.snapshot_pending or self.state_log.needs_snapshot():
+            self.snapshot()
+
+    def apply_event(self, entry: dict) -> bool:
+        """
+        Route a journal event to its register_* handler; return whether it changed the state
+        (False for events we do not handle, and for handled ones without anything new for us)
+        """
+        event: str = entry['event']
+        if event not in self.handled_events:
+            return False
+        self.ensure_loaded()
+
+        if event == 'FSDJump':
+            return self.register_system(entry)
+        elif event in ('Location', 'CarrierJump'):
+            # on game start, or when the fleet carrier we are on jumped
+            return self.register_location(entry)
+        elif event == 'SAASignalsFound':
+            return self.register_detail_scan(entry)
+        elif event == 'FSSBodySignals':
+            # happens when the Full Spectrum Scanner finds something on a planet
+            return self.register_signal_count(entry)
+        elif event == 'Scan':
+            # happens when the Full Spectrum Scanner identifies a planet
+            return self.register_body_scan(entry)
+        elif event == 'CodexEntry':
+            # happens when the ship's comp-scanner identifies something
+            return self.register_codex_entry(entry)
+        elif event == 'ScanOrganic':
+            # happens when Artemis suit scans a biological
+            return self.register_organic(entry)
+        return False
+
+    def register_system(self, entry:dict) -> bool:
+        if self.memory is not None:
+            # before clearing, so that every such checkpoint sees one full system; growth between them piles up
+            self.memory_checkpoint(f'FSDJump from {self.current_system_name or "?"}')
+        self.archive_system()
         self.current_system_name = entry['StarSystem']
+        self.current_system_address = entry.get('SystemAddress')
+        self.current_region = None
         self.clear_all()
-        # TODO: write current system to config
+        self.snapshot_pending = True
+        return True
+
+    def leaves_system(self, entry: dict) -> bool:
+        """True for an event moving us out of the current system"""
+        return entry['event'] == 'FSDJump' or (
+            entry['event'] in ('Location', 'CarrierJump') and entry['StarSystem'] != self.current_system_name
+        )
 
-    def register_detail_scan(self, entry: dict) -> None:
+    def register_location(self, entry: dict) -> bool:
+        if self.leaves_system(entry):
+            return self.register_system(entry)
+        if 'SystemAddress' in entry and entry['SystemAddress'] != self.current_system_address:
+            # e.g. still in the system we were in before a restart, whose address was not known yet
+            self.current_system_address = entry['SystemAddress']
+            self.request_persist()
+            return True
+        return False
+
+    @staticmethod
+    def stub_body(event: dict) -> Body:
+        """
+        Placeholder for a body known from its signals only, until its Scan arrives;
+        it keeps the system address, so the system can be archived without any Scan
+        """
+        data: dict = {"BodyName": event['BodyName'], "BodyID": event['BodyID']}
+        if 'SystemAddress' in event:
+            data['SystemAddress'] = event['SystemAddress']
+        return Body(data)
+
+    def register_detail_scan(self, entry: dict) -> bool:
         """
         Handles result of a detailed planet scan, extracting genus list:
         {
@@ -166,11 +670,11 @@ class ExplorationHelper:
         """
         if "Genuses" not in entry:
             # not a scan we are interested in
-            return
+            return False
 
         body_id: int = entry["BodyID"]
         if body_id not in self.system_bodies:
-            self.system_bodies[body_id] = Body({"BodyName": entry['BodyName']})
+            self.system_bodies[body_id] = self.stub_body(entry)
         body: Body = self.system_bodies[body_id]
 
         if body_id  not in self.bio_signs:
@@ -181,16 +685,17 @@ class ExplorationHelper:
         for b in scan_results:
             if b.is_done() or b.is_exact():
                 self.logger.info(f'Ignoring SSA data for known {body.name()}')
-                return
+                return False
         scan_results.clear()
 
         for genus in entry["Genuses"]:
-            scan_results.append(ScanFromOrbit(genus['Genus_Localised'], body))
+            scan_results.append(ScanFromOrbit(genus['Genus_Localised'], body, symbol=genus.get('Genus', '')))
 
         # self.logger.info(f'Bioscan result for {body.name()}: {scan_results}')
-        self.frame_redraw()
+        self.body_changed(body_id)
+        return True
 
-    def register_organic(self, event: dict) -> None:
+    def register_organic(self, event: dict) -> bool:
         """
         register detail scan of some organic, so we can fix price display
                 {
@@ -213,7 +718,7 @@ class ExplorationHelper:
         # genus_name: str = event['Genus_Localised']
         species_name: str = event['Species_Localised']
 
-        new_scan: ScanWithShipOrSuit = ScanWithShipOrSuit(species_name)
+        new_scan: ScanWithShipOrSuit = ScanWithShipOrSuit(species_name, symbol=event.get('Species', ''))
         if event['ScanType'] == 'Analyse':
             new_scan.signature_count = 1
 
@@ -222,9 +727,10 @@ class ExplorationHelper:
 
         scan_list: list[ScanResult] = self.bio_signs[body_id]
         new_scan.emplace_in_list(scan_list)
-        self.frame_redraw()
+        self.body_changed(body_id)
+        return True
 
-    def register_codex_entry(self, event: dict):
+    def register_codex_entry(self, event: dict) -> bool:
         """
             Happens (among others?) when scanning a plant using the ship's Component Scanner
             { "timestamp":"2025-06-16T15:51:51Z",
@@ -246,24 +752,27 @@ class ExplorationHelper:
             }
         """
         self.logger.info(f'Ship identified target: {event["Name_Localised"]}')
+        region: str|None = self.current_region
+        self.current_region = event.get('Region_Localised', self.current_region)
         # yes.... for some reason, the semicolon is part of the category name.
         # Possibly to match the $ marker in some template engine?
         if event['SubCategory'] != '$Codex_SubCategory_Organic_Structures;':
-            return
+            # only the region may be new
+            return self.current_region != region
         body_id: int = event['BodyID']
         genus, species = helpers.strip_variant(event['Name_Localised'])
         full_name: str = f'{genus} {species}'
 
-        new_scan: ScanWithShipOrSuit = ScanWithShipOrSuit(full_name)
+        new_scan: ScanWithShipOrSuit = ScanWithShipOrSuit(full_name, symbol=event['Name'])
 
         if body_id not in self.bio_signs:
-            self.bio_signs[body_id] = [new_scan]
-            return
+            self.bio_signs[body_id] = []
 
         new_scan.emplace_in_list(self.bio_signs[body_id])
-        self.frame_redraw()
+        self.body_changed(body_id)
+        return True
 
-    def register_body_scan(self, event: dict) -> None:
+    def register_body_scan(self, event: dict) -> bool:
         """
         Initial scan of a body:
         { "timestamp":"2025-06-18T16:26:36Z", "event":"Scan", "ScanType":"Detailed",
@@ -291,9 +800,10 @@ class ExplorationHelper:
         body: Body = Body(event)
 
         self.system_bodies[body_id] = body
-        self.frame_redraw()
+        self.body_changed(body_id)
+        return True
 
-    def register_signal_count(self, event: dict) -> None:
+    def register_signal_count(self, event: dict) -> bool:
         body_id: int = event["BodyID"]
         body_name: str = event["BodyName"]
         bio_count: int = helpers.get_bio_signal_count(event)
@@ -301,9 +811,11 @@ class ExplorationHelper:
             self.logger.warning(f'Found {bio_count} bio signs on {body_name}')
             # for some stupid reason this bio count may show up before the actual planet description
             if body_id not in self.system_bodies:
-                self.system_bodies[body_id] = Body({"BodyName": body_name, "BodyID": body_id})
+                self.system_bodies[body_id] = self.stub_body(event)
 
             if body_id not in self.bio_signs:
                 self.bio_signs[body_id] = []
             ScanResult(bio_count).emplace_in_list(self.bio_signs[body_id])
-            self.frame_redraw()
+            self.body_changed(body_id)
+            return True
+        return False
@@ -0,0 +1,235 @@
+"""
+Live follower for the journal directory, running the exploration helper without EDMC:
+
+    python follow.py <journal directory> [--state <directory>] [--interval <seconds>]
+
+The newest Journal.*.log is read from its start (which restores the current game session) and then
+tailed; when the game starts a new journal file, the follower switches over to it.
+Events go through the same routing as load.journal_entry; after each burst of events,
+the table of interesting bodies is printed as text.
+"""
+import argparse
+import asyncio
+import logging
+
+from explorationhelper import ExplorationHelper
+from instrumentation import Instrumentation, MemoryTracker
+from memoryconfig import MemoryConfig
+from metrics import MetricsExporter
+from replay import journal_files, parse_line
+
+
+class JournalTailer:
+    """
+    Incremental reader of the newest journal file in a directory.
+    Only complete lines are returned; a partially written last line is kept until the game finishes it.
+    """
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self.path: str|None = None
+        self.position: int = 0
+        self.partial: bytes = b''
+
+    def newest(self) -> str|None:
+        files: list[str] = journal_files(self.directory)
+        return files[-1] if files else None
+
+    def read_lines(self) -> list[str]:
+        if self.path is None:
+            return []
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.position)
+                data: bytes = f.read()
+        except FileNotFoundError:
+            return []
+        self.position += len(data)
+        lines: list[bytes] = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        return [line.decode('utf-8', errors='replace') for line in lines]
+
+    def poll(self) -> list[str]:
+        """All lines completed since the last call, including those of a rotation to a new journal file"""
+        lines: list[str] = self.read_lines()
+        newest: str|None = self.newest()
+        if newest is not None and newest != self.path:
+            # the old file is complete now: a last line without newline is still a line
+            if self.partial:
+                lines.append(self.partial.decode('utf-8', errors='replace'))
+            self.path = newest
+            self.position = 0
+            self.partial = b''
+            lines += self.read_lines()
+        return lines
+
+
+class Follower:
+    """
+    Tails the journal into a bounded queue, and feeds the queued events to the helper in batches.
+    If the helper falls behind, the tailer waits for room in the queue instead of buffering without limit.
+    """
+    # most events handled in one go before the view is updated
+    batch_size: int = 500
+
+    def __init__(
+            self, helper: ExplorationHelper, tailer: JournalTailer,
+            interval: float = 1.0, queue_size: int = 10000, output: any = print
+    ):
+        self.helper: ExplorationHelper = helper
+        self.tailer: JournalTailer = tailer
+        self.interval: float = interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.output = output
+        self.events: int = 0
+        self.batches: int = 0
+        self.last_view: list[str] = []
+
+    async def tail(self) -> None:
+        while True:
+            for line in self.tailer.poll():
+                entry: dict|None = parse_line(line)
+                if entry is not None:
+                    await self.queue.put(entry)
+            await asyncio.sleep(self.interval)
+
+    async def consume(self) -> None:
+        while True:
+            batch: list[dict] = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.helper.ingest(batch)
+            self.events += len(batch)
+            self.batches += 1
+            self.show()
+
+    def view(self) -> list[str]:
+        return [
+            ' | '.join(cell['text'] for cell in cells)
+            for _, cells in self.helper.view_rows()
+        ]
+
+    def show(self) -> None:
+        """Print the table, if it changed since it was last printed"""
+        view: list[str] = self.view()
+        if view == self.last_view:
+            return
+        self.last_view = view
+        self.output(f'--- {self.helper.current_system_name}')
+        for line in view:
+            self.output(line)
+
+    async def run(self) -> None:
+        await asyncio.gather(self.tail(), self.consume())
+
+
+def main(argv: list[str]|None = None) -> None:
+    parser = argparse.ArgumentParser(description='Follow the Elite Dangerous journal without EDMC')
+    parser.add_argument('directory', help='directory containing Journal.*.log files')
+    parser.add_argument('--state', default=None, help='keep the state in this directory between runs')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between checks for new events')
+    parser.add_argument(
+        '--memory', type=float, default=None, metavar='MINUTES',
+        help='trace memory use, reported on every jump and every MINUTES (to stderr)'
+    )
+    parser.add_argument('--metrics-port', type=int, default=None, help='serve Prometheus metrics on this local port')
+    parser.add_argument('--metrics-file', default=None, help='write Prometheus metrics to this textfile')
+    args = parser.parse_args(argv)
+
+    logger: logging.Logger = logging.getLogger('follow')
+    logger.setLevel(logging.WARNING)
+    memory: MemoryTracker|None = None
+    if args.memory is not None:
+        memory = MemoryTracker(interval=args.memory * 60)
+        memory.start()
+        # the reports are logged at info level
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.StreamHandler())
+    metrics: MetricsExporter|None = None
+    if args.metrics_port is not None or args.metrics_file:
+        metrics = MetricsExporter(textfile=args.metrics_file, port=args.metrics_port)
+        metrics.start()
+    helper: ExplorationHelper = ExplorationHelper(
+        logger, MemoryConfig(), state_dir=args.state, memory=memory,
+        instrumentation=Instrumentation(enabled=metrics is not None, log_enabled=False), metrics=metrics
+    )
+    follower: Follower = Follower(helper, JournalTailer(args.directory), interval=args.interval)
+    try:
+        asyncio.run(follower.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        helper.shutdown()
+
+
+def test_tailer(tmp_path) -> None:
+    tailer: JournalTailer = JournalTailer(str(tmp_path))
+    assert tailer.poll() == []
+
+    first = tmp_path / 'Journal.2025-06-13T152813.01.log'
+    first.write_bytes(b'{"event":"Fileheader"}\n{"event":"FSDJump", "StarS')
+    assert tailer.poll() == ['{"event":"Fileheader"}']
+    with open(first, 'ab') as f:
+        f.write(b'ystem":"A"}\n')
+    assert tailer.poll() == ['{"event":"FSDJump", "StarSystem":"A"}']
+    assert tailer.poll() == []
+
+    # game restart: the rest of the old file, then the new one
+    with open(first, 'ab') as f:
+        f.write(b'{"event":"Shutdown"}')
+    (tmp_path / 'Journal.2025-06-14T100000.01.log').write_bytes(b'{"event":"Fileheader"}\n')
+    assert tailer.poll() == ['{"event":"Shutdown"}', '{"event":"Fileheader"}']
+
+
+def test_follower(tmp_path) -> None:
+    journal = tmp_path / 'Journal.2025-06-13T152813.01.log'
+    journal.write_text(
+        '{"event":"FSDJump", "StarSystem":"Sys", "SystemAddress":1}\n'
+        '{"event":"Scan", "BodyName":"Sys 1", "BodyID":1, "SystemAddress":1,'
+        ' "PlanetClass":"Earthlike body", "WasMapped":false}\n'
+    )
+    printed: list[str] = []
+    helper: ExplorationHelper = ExplorationHelper(logging.getLogger('pytest'), MemoryConfig())
+    follower: Follower = Follower(
+        helper, JournalTailer(str(tmp_path)), interval=0.01, queue_size=1, output=printed.append
+    )
+
+    async def run_for_a_while() -> None:
+        task = asyncio.ensure_future(follower.run())
+        await asyncio.sleep(0.1)
+        with open(journal, 'a') as f:
+            f.write('{"event":"Scan", "BodyName":"Sys 2", "BodyID":2, "SystemAddress":1,'
+                    ' "PlanetClass":"Water world", "WasMapped":false}\n')
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run_for_a_while())
+    assert follower.events == 3
+    # printed once after the first burst, and again for the appended line
+    assert printed == ['--- Sys', ' 1 | [3 M]', '--- Sys', ' 1 | [3 M]', ' 2 | [1 M]']
+
+
+def test_without_tkinter() -> None:
+    import os
+    import subprocess
+    import sys
+
+    # a headless box may not have python3-tk at all
+    code: str = (
+        "import sys; sys.modules['tkinter'] = None\n"
+        "import follow\n"
+        "from explorationhelper import ExplorationHelper\n"
+        "from memoryconfig import MemoryConfig\n"
+        "helper = ExplorationHelper(__import__('logging').getLogger(), MemoryConfig())\n"
+        "helper.journal_event({'event': 'Scan', 'BodyName': '1', 'BodyID': 1, 'PlanetClass': 'Water world'})\n"
+        "print(helper.view_rows()[0][1][0]['justify'])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'right\n'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+class Slot:
+    """
+    One pooled widget of the visible window, with the properties it currently shows
+    """
+    def __init__(self, widget: any, props: dict):
+        self.widget: any = widget
+        self.props: dict = props
+        self.visible: bool = True
+
+
+class GridRenderer:
+    """
+    Virtualized, scrollable table of labels inside a tk frame.
+
+    The full table is kept as plain data (per row: key and label properties per column); only a window
+    of visible_rows x visible_columns labels exists, taken from a fixed pool that is filled on demand.
+    Scrolling, like a redraw, only re-configures the pooled labels whose properties change.
+    The first frozen_columns columns (body name and value) stay in place when scrolling sideways.
+    """
+    def __init__(
+            self, tk_impl: any, frame: any, visible_rows: int = 12, visible_columns: int = 8, frozen_columns: int = 2
+    ):
+        self.tk = tk_impl
+        self.frame = frame
+        self.visible_rows: int = visible_rows
+        self.visible_columns: int = visible_columns
+        self.frozen_columns: int = frozen_columns
+        self.rows: list[list[dict]] = []
+        self.first_row: int = 0
+        self.first_column: int = 0
+        self.slots: list[list[Slot|None]] = [[None] * visible_columns for _ in range(visible_rows)]
+        # scrollbars, only while the table does not fit
+        self.vertical: Slot|None = None
+        self.horizontal: Slot|None = None
+
+    def clear(self) -> None:
+        for slots in self.slots:
+            for col, slot in enumerate(slots):
+                if slot is not None:
+                    slot.widget.destroy()
+                    slots[col] = None
+        for scrollbar in (self.vertical, self.horizontal):
+            if scrollbar is not None:
+                scrollbar.widget.destroy()
+        self.vertical = None
+        self.horizontal = None
+        self.rows = []
+        self.first_row = 0
+        self.first_column = 0
+
+    def render(self, rows: list[tuple[any, list[dict]]]) -> None:
+        """
+        Display the given rows in order; each row is (key, [label properties per column])
+        """
+        self.rows = [cells for _, cells in rows]
+        self.refresh()
+
+    def column_count(self) -> int:
+        return max((len(cells) for cells in self.rows), default=0)
+
+    def scroll_limits(self) -> tuple[int, int]:
+        """Highest first_row and first_column that still fill the window"""
+        return (
+            max(len(self.rows) - self.visible_rows, 0),
+            max(self.column_count() - self.visible_columns, 0)
+        )
+
+    def scroll_to(self, first_row: int, first_column: int) -> None:
+        max_row, max_column = self.scroll_limits()
+        first_row = min(max(first_row, 0), max_row)
+        first_column = min(max(first_column, 0), max_column)
+        if (first_row, first_column) != (self.first_row, self.first_column):
+            self.first_row = first_row
+            self.first_column = first_column
+            self.refresh()
+
+    def refresh(self) -> None:
+        max_row, max_column = self.scroll_limits()
+        self.first_row = min(self.first_row, max_row)
+        self.first_column = min(self.first_column, max_column)
+
+        for row in range(self.visible_rows):
+            row_index: int = self.first_row + row
+            cells: list[dict] = self.rows[row_index] if row_index < len(self.rows) else []
+            for col in range(self.visible_columns):
+                cell_index: int = col if col < self.frozen_columns else col + self.first_column
+                self.show(row, col, cells[cell_index] if cell_index < len(cells) else None)
+        self.update_scrollbars()
+
+    def show(self, row: int, col: int, props: dict|None) -> None:
+        slot: Slot|None = self.slots[row][col]
+        if props is None:
+            if slot is not None and slot.visible:
+                slot.widget.grid_remove()
+                slot.visible = False
+            return
+
+        if slot is None:
+            self.slots[row][col] = Slot(self.create_label(props, row, col), props)
+            return
+
+        changes: dict = {k: v for k, v in props.items() if slot.props.get(k) != v}
+        for k in slot.props:
+            if k not in props:
+                # option went away (e.g. background): back to the default value
+                changes[k] = slot.widget.configure(k)[3]
+        if changes:
+            slot.widget.configure(**changes)
+        if not slot.visible:
+            slot.widget.grid(row=row, column=col, sticky=self.tk.W)
+            slot.visible = True
+        slot.props = props
+
+    def create_label(self, props: dict, row: int, col: int) -> any:
+        label = self.tk.Label(self.frame, **props)
+        label.grid(row=row, column=col, sticky=self.tk.W)
+        label.bind('<MouseWheel>', self.on_wheel)
+        label.bind('<Button-4>', lambda _event: self.scroll_to(self.first_row - 1, self.first_column))
+        label.bind('<Button-5>', lambda _event: self.scroll_to(self.first_row + 1, self.first_column))
+        return label
+
+    def on_wheel(self, event: any) -> None:
+        self.scroll_to(self.first_row - (1 if event.delta > 0 else -1), self.first_column)
+
+    @staticmethod
+    def scroll_position(args: tuple, first: int, total: int, page: int) -> int:
+        """New first row/column for the arguments of a scrollbar command"""
+        if args[0] == 'moveto':
+            return round(float(args[1]) * total)
+        step: int = int(args[1])
+        return first + (step * page if args[2] == 'pages' else step)
+
+    def yview(self, *args) -> None:
+        self.scroll_to(
+            self.scroll_position(args, self.first_row, len(self.rows), self.visible_rows), self.first_column
+        )
+
+    def xview(self, *args) -> None:
+        scrolling: int = max(self.column_count() - self.frozen_columns, 1)
+        self.scroll_to(
+            self.first_row,
+            self.scroll_position(args, self.first_column, scrolling, self.visible_columns - self.frozen_columns)
+        )
+
+    def update_scrollbars(self) -> None:
+        max_row, max_column = self.scroll_limits()
+        scrolling: int = max(self.column_count() - self.frozen_columns, 1)
+        window: int = self.visible_columns - self.frozen_columns
+        self.vertical = self.update_scrollbar(
+            self.vertical, max_row > 0, self.tk.VERTICAL, self.yview,
+            {"row": 0, "column": self.visible_columns, "rowspan": self.visible_rows, "sticky": self.tk.NS},
+            (self.first_row / max(len(self.rows), 1), (self.first_row + self.visible_rows) / max(len(self.rows), 1))
+        )
+        self.horizontal = self.update_scrollbar(
+            self.horizontal, max_column > 0, self.tk.HORIZONTAL, self.xview,
+            {"row": self.visible_rows, "column": self.frozen_columns, "columnspan": window, "sticky": self.tk.EW},
+            (self.first_column / scrolling, (self.first_column + window) / scrolling)
+        )
+
+    def update_scrollbar(
+            self, slot: Slot|None, needed: bool, orient: str, command: callable, placement: dict, view: tuple
+    ) -> Slot|None:
+        """Show a scrollbar (created on first need) with the visible fraction <view>, or hide it"""
+        if not needed:
+            if slot is not None and slot.visible:
+                slot.widget.grid_remove()
+                slot.visible = False
+            return slot
+
+        if slot is None:
+            slot = Slot(self.tk.Scrollbar(self.frame, orient=orient, command=command), placement)
+            slot.visible = False
+        if not slot.visible:
+            slot.widget.grid(**placement)
+            slot.visible = True
+        slot.widget.set(*view)
+        return slot
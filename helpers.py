@@ -1,3 +1,9 @@
+from json import dumps, loads
+
+from biologial import eligibility_index, species_index
+from valuationcache import ValuationCache
+
+
 def get_bio_signal_count(entry: dict) -> int:
     """
     looking for this one:
@@ -30,29 +36,27 @@ def get_genus_list(entry: dict, body_info: dict) -> dict[str, tuple]:
     return res
 
 
-def get_value_range(genus_name: str, body_info: dict) -> tuple[float, float]:
-    from biologial import all_bios
-
-    min_value: float = 999.0
-    max_value: float = 0.0
-    genus_known: bool = False
+valuation_cache: ValuationCache = ValuationCache()
 
-    for b in all_bios:
-        if b.category != genus_name:
-            continue
-        genus_known = True
-        if body_info and not b.can_grow_on(body_info):
-            continue
 
-        if b.net_worth > max_value:
-            max_value = b.net_worth
-        if b.net_worth < min_value:
-            min_value = b.net_worth
+def get_genus_ranges(body_info: dict) -> dict[str, tuple[float, float]]:
+    """
+    Value range of every known genus on the body; (0, 0) if it can not grow there.
+    Shared between all bodies with the same filter fingerprint, so do not modify the result.
+    """
+    index = eligibility_index()
+    return valuation_cache.get(
+        index,
+        ('genus', index.fingerprint(body_info)),
+        lambda: index.genus_ranges(body_info)
+    )
 
-    if min_value == 999.0:
-        return (0.0,0.0) if genus_known else (1.0, 999.0)
 
-    return min_value, max_value
+def get_value_range(genus_name: str, body_info: dict) -> tuple[float, float]:
+    ranges: dict[str, tuple[float, float]] = get_genus_ranges(body_info)
+    if genus_name not in ranges:
+        return 1.0, 999.0
+    return ranges[genus_name]
 
 
 def get_value_range_anonymous(body: dict, count: int) -> tuple[float, float]:
@@ -60,11 +64,17 @@ def get_value_range_anonymous(body: dict, count: int) -> tuple[float, float]:
     More complicated function... get value range for every genus,
     and then pick the <count> worst and best for the range.
     """
-    from biologial import all_bios
+    index = eligibility_index()
+    return valuation_cache.get(
+        index,
+        ('anonymous', index.fingerprint(body), count),
+        lambda: value_range_anonymous(get_genus_ranges(body), count)
+    )
+
 
+def value_range_anonymous(genus_ranges: dict[str, tuple[float, float]], count: int) -> tuple[float, float]:
     genus_value_ranges: list[tuple[str,float,float]] = []
-    for genus in set([b.category for b in all_bios]):
-        mn, mx = get_value_range(genus, body)
+    for genus, (mn, mx) in genus_ranges.items():
         if mn == 0.0:
             # genus can not grow on that planet
             continue
@@ -90,12 +100,10 @@ def get_species_value(species_name: str) -> float:
     """
     Species name is basically "<genus> <subtype>", without the color variant
     """
-    from biologial import all_bios
-
-    for b in all_bios:
-        if f'{b.category} {b.name}' == species_name:
-            return b.net_worth
-    return 999.0
+    index = species_index()
+    if species_name not in index.species_ids:
+        return 999.0
+    return index.species[index.species_ids[species_name]].net_worth
 
 
 def strip_variant(variant_name: str) -> (str, str):
@@ -103,20 +111,17 @@ def strip_variant(variant_name: str) -> (str, str):
         Receives a full variant name like "Bacterium Acies - Aquamarine"
         and returns the genus and species parts ("Bacterium", "Acies")
     """
-    from biologial import all_bios
-
     species_name: str = variant_name.split(" - ")[0]
-    for b in all_bios:
-        if f'{b.category} {b.name}' == species_name:
-            return b.category, b.name
+    index = species_index()
+    if species_name in index.species_ids:
+        b = index.species[index.species_ids[species_name]]
+        return b.category, b.name
     # fallback: split on space and return first two parts
     fallback = variant_name.split(" ", 3)
     return fallback[0], fallback[1]
 
 
 def scans_to_str(body_id: int, scan_list: list) -> str:
-    from json import dumps
-
     obj: dict = {
         "BodyID": body_id,
         "ScanResults": [
@@ -135,7 +140,6 @@ def test_scan_to_str() -> None:
 
 
 def str_to_scans(data: list[str], system_bodies: dict[int, 'Body']) -> dict[int, list['ScanResult']]:
-    from json import loads
     from body import Body
     from scanresult import ScanResult
 
@@ -148,5 +152,4 @@ def str_to_scans(data: list[str], system_bodies: dict[int, 'Body']) -> dict[int,
             ScanResult.deserialize(dd, body)
             for dd in decoded['ScanResults']
         ]
-        print(f'#### loaded biosigns for body {body_id}: {res[body_id]}')
     return res
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+from json import dumps
+
+
+class HistoryStore:
+    """
+    Local SQLite archive of all visited systems, with their bodies and scan results,
+    keyed by SystemAddress and BodyID. ExplorationHelper only keeps the current system
+    in memory, and archives it here when jumping on.
+    """
+    schema: str = """
+        CREATE TABLE IF NOT EXISTS systems (
+            system_address INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            region TEXT,
+            archived TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS systems_region ON systems (region);
+
+        CREATE TABLE IF NOT EXISTS bodies (
+            system_address INTEGER NOT NULL,
+            body_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            planet_class TEXT,
+            was_mapped INTEGER NOT NULL,
+            value_min REAL NOT NULL,
+            value_max REAL NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (system_address, body_id)
+        );
+        CREATE INDEX IF NOT EXISTS bodies_planet_class ON bodies (planet_class);
+
+        CREATE TABLE IF NOT EXISTS scans (
+            system_address INTEGER NOT NULL,
+            body_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            genus TEXT NOT NULL,
+            signature_count INTEGER NOT NULL,
+            done INTEGER NOT NULL,
+            value_min REAL NOT NULL,
+            value_max REAL NOT NULL,
+            PRIMARY KEY (system_address, body_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS scans_genus ON scans (genus);
+        CREATE INDEX IF NOT EXISTS scans_unfinished ON scans (value_max) WHERE done = 0;
+    """
+
+    def __init__(self, path: str):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(self.schema)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def archive(
+            self, system_address: int, system_name: str, region: str|None,
+            bodies: dict[int, 'Body'], bio_signs: dict[int, list['ScanResult']]
+    ) -> None:
+        """
+        Store (or replace) everything known about one system, in a single transaction
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO systems VALUES (?, ?, COALESCE(?, (SELECT region FROM systems WHERE system_address = ?)), ?)",
+                (system_address, system_name, region, system_address, datetime.now(timezone.utc).isoformat())
+            )
+            self.db.execute("DELETE FROM bodies WHERE system_address = ?", (system_address,))
+            self.db.execute("DELETE FROM scans WHERE system_address = ?", (system_address,))
+            self.db.executemany(
+                "INSERT INTO bodies VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        system_address, body_id, body.name(), body.pget('PlanetClass'), body.was_mapped(),
+                        body.value_min, body.value_max, dumps(body.to_dict())
+                    )
+                    for body_id, body in bodies.items()
+                ]
+            )
+            self.db.executemany(
+                "INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        system_address, body_id, position, scan.name, scan.genus(), scan.signature_count,
+                        scan.is_done(), *bodies[body_id].scan_value_range(scan)
+                    )
+                    for body_id, scan_list in bio_signs.items()
+                    if body_id in bodies
+                    for position, scan in enumerate(scan_list)
+                ]
+            )
+
+    def unfinished_bodies(self, min_value: float = 10.0) -> list[tuple[str, str, float]]:
+        """
+        Bodies with bio signals not fully scanned yet, of which at least one may be worth <min_value> M or more.
+        Returns (system name, body name, max. value of the unfinished signals) per body, most valuable first.
+        """
+        return self.db.execute(
+            """
+            SELECT systems.name, bodies.name, SUM(scans.value_max) AS open_value
+            FROM scans
+                JOIN bodies USING (system_address, body_id)
+                JOIN systems USING (system_address)
+            WHERE scans.done = 0 AND scans.value_max >= ?
+            GROUP BY scans.system_address, scans.body_id
+            ORDER BY open_value DESC
+            """,
+            (min_value,)
+        ).fetchall()
+
+    def bodies_with_genus(self, genus: str) -> list[tuple[str, str]]:
+        """(system name, body name) of all bodies where the genus was seen"""
+        return self.db.execute(
+            """
+            SELECT DISTINCT systems.name, bodies.name
+            FROM scans
+                JOIN bodies USING (system_address, body_id)
+                JOIN systems USING (system_address)
+            WHERE scans.genus = ?
+            """,
+            (genus,)
+        ).fetchall()
+
+    def systems_in_region(self, region: str) -> list[str]:
+        return [
+            row[0]
+            for row in self.db.execute("SELECT name FROM systems WHERE region = ? ORDER BY name", (region,))
+        ]
+
+    def bodies_of_class(self, planet_class: str) -> list[tuple[str, str]]:
+        return self.db.execute(
+            """
+            SELECT systems.name, bodies.name
+            FROM bodies JOIN systems USING (system_address)
+            WHERE bodies.planet_class = ?
+            """,
+            (planet_class,)
+        ).fetchall()
+
+
+def test_history() -> None:
+    from body import Body
+    from scanresult import ScanResult, ScanFromOrbit, ScanWithShipOrSuit
+
+    planet: Body = Body({
+        "BodyName": "Sys 1", "BodyID": 1, "PlanetClass": "Rocky body", "WasMapped": False,
+        "AtmosphereComposition": [{"Name": "CarbonDioxide", "Percent": 100.0}],
+        "SurfaceTemperature": 170.0, "SurfaceGravity": 1.0
+    })
+    bios: list[ScanResult] = [ScanFromOrbit('Tubus', planet), ScanWithShipOrSuit('Bacterium Acies')]
+    bios[1].signature_count = 1
+    planet.update_value(bios)
+    moon: Body = Body({"BodyName": "Sys 1 a", "BodyID": 2, "PlanetClass": "Icy body"})
+
+    store: HistoryStore = HistoryStore(':memory:')
+    store.archive(42, "Sys", "Inner Orion Spur", {1: planet, 2: moon}, {1: bios, 2: [ScanResult(1)]})
+    # re-archiving replaces, and keeps the region
+    store.archive(42, "Sys", None, {1: planet, 2: moon}, {1: bios, 2: [ScanResult(1)]})
+
+    # Tubus Cavas is the best option on the planet; anything could grow on the moon (no atmosphere known)
+    assert store.unfinished_bodies(10.0) == [("Sys", "Sys 1 a", 19.0), ("Sys", "Sys 1", 11.9)]
+    assert store.unfinished_bodies(15.0) == [("Sys", "Sys 1 a", 19.0)]
+    assert store.bodies_with_genus("Bacterium") == [("Sys", "Sys 1")]
+    assert store.systems_in_region("Inner Orion Spur") == ["Sys"]
+    assert store.bodies_of_class("Icy body") == [("Sys", "Sys 1 a")]
@@ -0,0 +1,427 @@
+import os
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from bisect import bisect_left
+from datetime import datetime
+
+
+class LatencyStats:
+    """
+    Count, total and a log-scale histogram of the durations of one kind of operation.
+    Bucket bounds grow by 20% each (1 us ... ~100 s), so percentiles are exact to about 20%,
+    and recording stays O(log buckets) with fixed memory, however long EDMC runs.
+    """
+    bounds: list[float] = [1e-6 * 1.2 ** n for n in range(140)]
+
+    def __init__(self):
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.buckets: list[int] = [0] * (len(LatencyStats.bounds) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(LatencyStats.bounds, seconds)] += 1
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0 < p <= 100)"""
+        if not self.count:
+            return 0.0
+        rank: float = self.count * p / 100.0
+        seen: int = 0
+        for n, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(LatencyStats.bounds[n], self.max) if n < len(LatencyStats.bounds) else self.max
+        return self.max
+
+    def __str__(self) -> str:
+        return (
+            f'n={self.count} total={self.total * 1e3:.1f}ms'
+            f' p50={self.percentile(50) * 1e3:.3f}ms p95={self.percentile(95) * 1e3:.3f}ms'
+            f' p99={self.percentile(99) * 1e3:.3f}ms max={self.max * 1e3:.3f}ms'
+        )
+
+
+class Measurement:
+    """Context manager timing one operation into an Instrumentation"""
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self.instrumentation: Instrumentation = instrumentation
+        self.name: str = name
+        self.start: float = 0.0
+
+    def __enter__(self) -> 'Measurement':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.instrumentation.add(self.name, time.perf_counter() - self.start)
+
+
+class NoMeasurement:
+    """Stand-in while instrumentation is off"""
+    def __enter__(self) -> 'NoMeasurement':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+no_measurement: NoMeasurement = NoMeasurement()
+
+
+class Instrumentation:
+    """
+    Latency statistics per operation name, e.g. "event.Scan" for the handling of a journal event type,
+    or "valuation", "persistence", "rendering" for the work done on behalf of the events.
+
+        with instrumentation.measure("rendering"):
+            ...
+
+    While disabled, measure() hands out a shared no-op context, so the instrumented code can stay in place.
+    With log_enabled False, the statistics are only collected (e.g. for the metrics exporter), never logged.
+    """
+    def __init__(self, enabled: bool = True, report_interval: float = 300.0, log_enabled: bool = True):
+        self.enabled: bool = enabled
+        self.log_enabled: bool = log_enabled
+        self.report_interval: float = report_interval
+        self.stats: dict[str, LatencyStats] = {}
+        self.last_report: float = time.monotonic()
+
+    def measure(self, name: str) -> Measurement|NoMeasurement:
+        return Measurement(self, name) if self.enabled else no_measurement
+
+    def add(self, name: str, seconds: float) -> None:
+        if name not in self.stats:
+            self.stats[name] = LatencyStats()
+        self.stats[name].add(seconds)
+
+    def report(self) -> list[str]:
+        return [f'{name}: {stats}' for name, stats in sorted(self.stats.items())]
+
+    def log(self, logger: any) -> None:
+        for line in self.report():
+            logger.info(f'latency {line}')
+        self.last_report = time.monotonic()
+
+    def log_periodically(self, logger: any) -> None:
+        """Log the statistics if report_interval seconds have passed since the last time"""
+        if self.enabled and self.log_enabled and time.monotonic() - self.last_report >= self.report_interval:
+            self.log(logger)
+
+
+class SlowEventProfiler:
+    """
+    Captures where slow journal events spend their time, without profiling all the time:
+    each event only notes its start, and once it has run for more than <threshold> seconds, a sampler thread
+    records the stack of the handling thread every <interval> seconds until the event finishes.
+    The samples are written to <directory> as "slow-<time>-<event type>-<N>bodies.folded", in the collapsed
+    stack format of flame graph tools ("module:function;module:function;... <count>" per distinct stack).
+    Only the <keep> newest files are kept.
+    """
+    def __init__(self, directory: str, threshold: float, keep: int = 10, interval: float = 0.002):
+        self.directory: str = directory
+        self.threshold: float = threshold
+        self.keep: int = keep
+        self.interval: float = interval
+        self.captured: int = 0
+        # the running event, shared with the sampler thread
+        self.lock: threading.Condition = threading.Condition()
+        self.thread_id: int|None = None
+        self.started: float = 0.0
+        self.samples: Counter|None = None
+        self.sampler: threading.Thread|None = None
+        self.stopping: bool = False
+
+    def start(self, event: str) -> None:
+        with self.lock:
+            self.thread_id = threading.get_ident()
+            self.started = time.perf_counter()
+            self.lock.notify()
+        if self.sampler is None:
+            self.sampler = threading.Thread(target=self.run, name='exploration-profiler', daemon=True)
+            self.sampler.start()
+
+    def finish(self, event: str, bodies: int) -> str|None:
+        """End the event; write its samples if it was slow, and return the file written"""
+        with self.lock:
+            self.thread_id = None
+            samples: Counter|None = self.samples
+            self.samples = None
+        return self.save(samples, event, bodies) if samples else None
+
+    def stop(self) -> None:
+        if self.sampler is not None:
+            with self.lock:
+                self.stopping = True
+                self.lock.notify()
+            self.sampler.join()
+            self.sampler = None
+            self.stopping = False
+
+    def run(self) -> None:
+        with self.lock:
+            while not self.stopping:
+                if self.thread_id is None:
+                    self.lock.wait()
+                    continue
+                remaining: float = self.started + self.threshold - time.perf_counter()
+                if remaining > 0:
+                    # woken early when the event finishes or the next one starts
+                    self.lock.wait(remaining)
+                    continue
+                frame: types.FrameType|None = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    if self.samples is None:
+                        self.samples = Counter()
+                    self.samples[self.stack(frame)] += 1
+                self.lock.wait(self.interval)
+
+    @staticmethod
+    def stack(frame: types.FrameType) -> str:
+        names: list[str] = []
+        while frame is not None:
+            names.append(f'{MemoryTracker.module(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def save(self, samples: Counter, event: str, bodies: int) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp: str = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        path: str = os.path.join(self.directory, f'slow-{stamp}-{event}-{bodies}bodies.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f'{stack} {count}\n')
+        self.captured += 1
+
+        files: list[str] = sorted(
+            name for name in os.listdir(self.directory) if name.startswith('slow-') and name.endswith('.folded')
+        )
+        for name in files[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+        return path
+
+
+def retained_size(root: any, seen: set[int]) -> int:
+    """
+    Approximate bytes held by <root>: sys.getsizeof of everything reachable through containers and
+    instance attributes. Objects in <seen> are skipped and the visited ones added, so that an object
+    shared between several roots is only counted for the first of them.
+    """
+    size: int = 0
+    stack: list = [root]
+    while stack:
+        obj: any = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float)):
+            if hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, '__slots__', ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return size
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'kB', 'MB'):
+        if abs(size) < 1024 or unit == 'MB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+class MemoryTracker:
+    """
+    Opt-in memory accounting for long-running instances, with tracemalloc.
+    Each checkpoint reports
+    - the memory traced in total,
+    - what the given roots (e.g. the bodies of the current system, the valuation cache) retain,
+      see retained_size; roots are counted in the given order, so shared objects go to the first one,
+    - the top allocation sites grouped by module, and their growth since the previous checkpoint.
+    Tracing slows down every allocation, so this is meant for hunting leaks, not for normal use.
+    """
+    def __init__(self, interval: float = 600.0, top: int = 10, frames: int = 1):
+        self.interval: float = interval
+        self.top: int = top
+        self.frames: int = frames
+        self.started: bool = False
+        self.previous: 'tracemalloc.Snapshot|None' = None
+        self.last_checkpoint: float = time.monotonic()
+        self.checkpoints: int = 0
+
+    def start(self) -> None:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started = True
+
+    def stop(self) -> None:
+        import tracemalloc
+
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+        self.previous = None
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_checkpoint >= self.interval
+
+    @staticmethod
+    def retained(roots: dict[str, any]) -> str:
+        seen: set[int] = set()
+        return ', '.join(f'{name} {format_size(retained_size(root, seen))}' for name, root in roots.items())
+
+    @staticmethod
+    def module(filename: str) -> str:
+        name: str = os.path.splitext(os.path.basename(filename))[0]
+        # a package is named by its directory
+        return os.path.basename(os.path.dirname(filename)) if name == '__init__' else name
+
+    def by_module(self, statistics: list) -> list[tuple[str, int, int]]:
+        """(module, size, count) per module, largest first; statistics are per file"""
+        modules: dict[str, list[int]] = {}
+        for stat in statistics:
+            entry: list[int] = modules.setdefault(self.module(stat.traceback[0].filename), [0, 0])
+            entry[0] += getattr(stat, 'size_diff', stat.size)
+            entry[1] += getattr(stat, 'count_diff', stat.count)
+        return sorted(
+            ((name, size, count) for name, (size, count) in modules.items()),
+            key=lambda m: -abs(m[1])
+        )[:self.top]
+
+    def checkpoint(self, reason: str, roots: dict[str, any]) -> list[str]:
+        """Take a snapshot and return the report lines"""
+        import tracemalloc
+
+        self.last_checkpoint = time.monotonic()
+        self.checkpoints += 1
+        if not tracemalloc.is_tracing():
+            return [f'memory at {reason}: not tracing', 'memory retained: ' + self.retained(roots)]
+
+        # before retained() allocates its bookkeeping
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        lines: list[str] = [
+            f'memory at {reason}: traced {format_size(current)} (peak {format_size(peak)})',
+            'memory retained: ' + self.retained(roots),
+        ]
+        lines.append('memory top: ' + ', '.join(
+            f'{name} {format_size(size)} in {count} blocks'
+            for name, size, count in self.by_module(snapshot.statistics('filename'))
+        ))
+        if self.previous is not None:
+            lines.append('memory growth: ' + ', '.join(
+                f'{name} {"+" if size >= 0 else "-"}{format_size(abs(size))} ({count:+d} blocks)'
+                for name, size, count in self.by_module(snapshot.compare_to(self.previous, 'filename'))
+                if size
+            ))
+        self.previous = snapshot
+        return lines
+
+
+def test_latency_stats() -> None:
+    stats: LatencyStats = LatencyStats()
+    for n in range(1, 101):
+        stats.add(n * 1e-3)
+    assert stats.count == 100 and abs(stats.total - 5.05) < 1e-9
+    # within one bucket (20%) of the exact values
+    assert 0.050 <= stats.percentile(50) <= 0.050 * 1.2
+    assert 0.095 <= stats.percentile(95) <= 0.095 * 1.2
+    assert stats.percentile(100) == stats.max == 0.1
+    assert LatencyStats().percentile(50) == 0.0
+
+
+def test_instrumentation() -> None:
+    instrumentation: Instrumentation = Instrumentation()
+    for _ in range(3):
+        with instrumentation.measure("event.Scan"):
+            pass
+    assert instrumentation.stats["event.Scan"].count == 3
+    assert instrumentation.report()[0].startswith("event.Scan: n=3 ")
+
+    silent: Instrumentation = Instrumentation(report_interval=0.0, log_enabled=False)
+    silent.add("event.Scan", 0.001)
+    logged: list[str] = []
+    silent.log_periodically(types.SimpleNamespace(info=logged.append))
+    assert logged == [] and silent.stats["event.Scan"].count == 1
+
+    disabled: Instrumentation = Instrumentation(enabled=False)
+    with disabled.measure("event.Scan"):
+        pass
+    assert disabled.stats == {}
+
+
+def test_slow_event_profiler(tmp_path) -> None:
+    def busy(seconds: float) -> None:
+        until: float = time.perf_counter() + seconds
+        while time.perf_counter() < until:
+            sum(range(100))
+
+    profiler: SlowEventProfiler = SlowEventProfiler(str(tmp_path), threshold=0.05, keep=2)
+    try:
+        profiler.start("Scan")
+        busy(0.001)
+        assert profiler.finish("Scan", 5) is None, "fast events are not sampled"
+
+        for n in range(3):
+            profiler.start("Scan")
+            busy(0.15)
+            assert profiler.finish("Scan", 100 + n) is not None, "the slow event itself is captured"
+        files: list[str] = sorted(os.listdir(tmp_path))
+        assert len(files) == 2 and files[-1].endswith("-Scan-102bodies.folded")
+        lines: list[str] = (tmp_path / files[-1]).read_text(encoding='utf-8').splitlines()
+        assert any(";instrumentation:busy" in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+        # nothing left running after a slow event
+        profiler.start("Scan")
+        busy(0.001)
+        assert profiler.finish("Scan", 5) is None and profiler.captured == 3
+    finally:
+        profiler.stop()
+    assert profiler.sampler is None
+
+
+def test_memory_tracker() -> None:
+    shared: list[str] = [f'shared {n}' for n in range(100)]
+    roots: dict[str, any] = {"first": {"a": shared}, "second": [shared, list(range(1000))]}
+    seen: set[int] = set()
+    first: int = retained_size(roots["first"], seen)
+    assert first > retained_size(shared, set()) > 100 * sys.getsizeof('shared 10')
+    # the shared list is counted for the first root only
+    assert retained_size(roots["second"], seen) < retained_size(roots["second"], set()) - first // 2
+
+    tracker: MemoryTracker = MemoryTracker(interval=0.0, top=3)
+    assert tracker.checkpoint("start", roots)[0] == "memory at start: not tracing"
+    tracker.start()
+    try:
+        tracker.checkpoint("FSDJump", roots)
+        leak: list[bytes] = [bytes(1000) for _ in range(1000)]
+        lines: list[str] = tracker.checkpoint("interval", roots)
+    finally:
+        tracker.stop()
+    assert lines[0].startswith("memory at interval: traced ")
+    assert lines[1].startswith("memory retained: first ") and ", second " in lines[1]
+    assert lines[2].startswith("memory top: instrumentation ")
+    assert lines[3].startswith("memory growth: instrumentation +")
+    assert tracker.due() and len(leak) == 1000
@@ -1,8 +1,13 @@
 import sys
+import time
+
+# plugin startup time, see the end of this file
+import_start: float = time.perf_counter()
 
 from typing import Any
 
 from explorationhelper import ExplorationHelper
+from instrumentation import Instrumentation, MemoryTracker, SlowEventProfiler
 
 import logging
 import os
@@ -18,8 +23,39 @@ plugin_name = os.path.basename(os.path.dirname(__file__))
 #     code, else the logger won't be properly set up.
 logger: logging.Logger = logging.getLogger(f'{appname}.{plugin_name}')
 
+# events running longer than this (if set) get their stacks sampled, see SlowEventProfiler
+profile_threshold_ms: int = config.get_int('explorationhelper.profile_threshold_ms', default=0)
+
+# latency statistics in the log
+log_instrumentation: bool = config.get_bool('explorationhelper.instrumentation', default=False)
+
+# Prometheus metrics on a local port and/or in a textfile, see metrics.py; they need the instrumentation
+metrics_port: int = config.get_int('explorationhelper.metrics_port', default=0)
+metrics_textfile: str = config.get_str('explorationhelper.metrics_textfile', default='')
+metrics: 'MetricsExporter|None' = None
+if metrics_port or metrics_textfile:
+    from metrics import MetricsExporter
+
+    metrics = MetricsExporter(textfile=metrics_textfile or None, port=metrics_port or None)
+
 this = sys.modules[__name__]
-this.exploration_helper = ExplorationHelper(logger, config)
+this.exploration_helper = ExplorationHelper(
+    logger, config,
+    state_dir=os.path.join(os.path.dirname(__file__), 'state'),
+    history_path=os.path.join(os.path.dirname(__file__), 'state', 'history.sqlite'),
+    # latency statistics, logged every 5 minutes and on shutdown if asked for; the metrics only read them
+    instrumentation=Instrumentation(
+        enabled=log_instrumentation or metrics is not None, log_enabled=log_instrumentation
+    ),
+    profiler=SlowEventProfiler(
+        os.path.join(os.path.dirname(__file__), 'state', 'profiles'), profile_threshold_ms / 1000.0
+    ) if profile_threshold_ms > 0 else None,
+    # tracemalloc accounting, logged on every jump and every 10 minutes; slows everything down
+    memory=MemoryTracker() if config.get_bool('explorationhelper.memory_diagnostics', default=False) else None,
+    metrics=metrics
+)
+if this.exploration_helper.memory is not None:
+    this.exploration_helper.memory.start()
 
 # If the Logger has handlers then it was already set up by the core code, else
 # it needs setting up here.
@@ -34,14 +70,32 @@ if not logger.hasHandlers():
     logger_channel.setFormatter(logger_formatter)
     logger.addHandler(logger_channel)
 
+# the stored state is only loaded on first use, so this should stay in the low milliseconds
+logger.debug(f'Plugin loaded in {(time.perf_counter() - import_start) * 1000:.1f} ms')
+
 
 def plugin_start3(plugin_dir: str) -> str:
     """
     Load this plugin into EDMarketConnector
     """
+    # journal events are handled off the tk thread, which only renders the results
+    this.exploration_helper.start_worker()
+    if this.exploration_helper.metrics is not None:
+        try:
+            this.exploration_helper.metrics.start()
+        except OSError as e:
+            # e.g. port in use; the textfile (if configured) still gets written
+            logger.error(f'Can not serve metrics on port {metrics_port}: {e}')
     return "Exploration-Helper"
 
 
+def plugin_stop() -> None:
+    """
+    EDMC is shutting down: write state changes that are still pending
+    """
+    this.exploration_helper.shutdown()
+
+
 def plugin_app(parent):
     """
     Create a pair of TK widgets for the EDMC main window
@@ -52,22 +106,4 @@ def plugin_app(parent):
 def journal_entry(
     cmdr: str, is_beta: bool, system: str, station: str, entry: dict[str, Any], state: dict[str, Any]
 ) -> None:
-    event: str = entry['event']
-
-    if event == 'FSDJump':
-        this.exploration_helper.register_system(entry)
-    elif event == 'SAASignalsFound':
-        this.exploration_helper.register_detail_scan(entry)
-    elif event == 'FSSBodySignals':
-        # happens when the Full Spectrum Scanner finds something on a planet
-        this.exploration_helper.register_signal_count(entry)
-    elif event == 'Scan':
-        # happens when the Full Spectrum Scanner identifies a planet
-        this.exploration_helper.register_body_scan(entry)
-    elif event == 'CodexEntry':
-        # happens when the ship's comp-scanner identifies something
-        this.exploration_helper.register_codex_entry(entry)
-    elif event == 'ScanOrganic':
-        # happens when Artemis suit scans a biological
-        this.exploration_helper.register_organic(entry)
-
+    this.exploration_helper.journal_event(entry)
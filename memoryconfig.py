@@ -0,0 +1,22 @@
+class MemoryConfig:
+    """
+    In-memory stand-in for the EDMC config, for running without EDMC
+    (headless tools) or for keeping state in a file of our own.
+    """
+    def __init__(self, data: dict|None = None):
+        self.data: dict = {} if data is None else data
+
+    def get_str(self, key: str, default: str = "") -> str:
+        return self.data[key] if key in self.data else default
+
+    def get_list(self, key: str, default: list = ()) -> list:
+        return self.data[key] if key in self.data else default
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        return self.data[key] if key in self.data else default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        return self.data[key] if key in self.data else default
+
+    def set(self, key: str, value: str|list|int|bool) -> None:
+        self.data[key] = value
@@ -0,0 +1,246 @@
+"""
+Telemetry of the exploration helper in the Prometheus text format, for watching headless installs from a dashboard.
+
+The metrics are rendered on the thread handling the journal events, at most every <interval> seconds,
+and then written atomically to a textfile (e.g. for the textfile collector of node_exporter)
+and/or served from a local HTTP port. Event counts and latencies come from the helper's Instrumentation,
+so that has to be enabled.
+"""
+import os
+import time
+
+import helpers
+from instrumentation import LatencyStats
+
+content_type: str = 'text/plain; version=0.0.4; charset=utf-8'
+quantiles: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsText:
+    """Collects metric families and renders them as exposition text"""
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name: str, value: float, labels: dict[str, str]|None = None) -> None:
+        label_text: str = ','.join(f'{k}="{escape(str(v))}"' for k, v in (labels or {}).items())
+        self.lines.append(f'{name}{{{label_text}}} {value!r}' if label_text else f'{name} {value!r}')
+
+    def metric(self, name: str, kind: str, help_text: str, value: float) -> None:
+        self.family(name, kind, help_text)
+        self.sample(name, value)
+
+    def summary(self, name: str, help_text: str, label: str, stats: dict[str, LatencyStats]) -> None:
+        self.family(name, 'summary', help_text)
+        for key, s in sorted(stats.items()):
+            for q in quantiles:
+                self.sample(name, s.percentile(q * 100), {label: key, 'quantile': str(q)})
+            self.sample(f'{name}_sum', s.total, {label: key})
+            self.sample(f'{name}_count', float(s.count), {label: key})
+
+    def text(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+class MetricsExporter:
+    """
+    Renders the metrics of an ExplorationHelper on update(), and publishes them to <textfile> and/or
+    on http://127.0.0.1:<port>/metrics (after start()). Either may be None.
+    """
+    def __init__(self, textfile: str|None = None, port: int|None = None, interval: float = 15.0):
+        self.textfile: str|None = textfile
+        self.port: int|None = port
+        self.interval: float = interval
+        # last rendered metrics; replaced as a whole, so the HTTP thread never sees a partial update
+        self.text: str = ''
+        self.last_update: float|None = None
+        self.server: 'http.server.ThreadingHTTPServer|None' = None
+
+    def start(self, host: str = '127.0.0.1') -> None:
+        """Start serving on the configured port, if any (0: pick a free one, see self.port afterwards)"""
+        if self.port is None:
+            return
+        # only imported when actually serving, to keep EDMC startup fast
+        import http.server
+        import threading
+
+        exporter: MetricsExporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body: bytes = exporter.text.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                # a scrape every few seconds does not belong in the EDMC log
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name='exploration-metrics', daemon=True).start()
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def due(self) -> bool:
+        return self.last_update is None or time.monotonic() - self.last_update >= self.interval
+
+    def update(self, helper: 'ExplorationHelper') -> None:
+        self.last_update = time.monotonic()
+        self.text = self.render(helper)
+        if self.textfile:
+            self.write_textfile()
+
+    def write_textfile(self) -> None:
+        """Replace the textfile atomically, so that a collector never reads half of it"""
+        tmp_path: str = self.textfile + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.text)
+        os.replace(tmp_path, self.textfile)
+
+    @staticmethod
+    def render(helper: 'ExplorationHelper') -> str:
+        out: MetricsText = MetricsText()
+        stats: dict[str, LatencyStats] = helper.instrumentation.stats
+        events: dict[str, LatencyStats] = {
+            name.removeprefix('event.'): s for name, s in stats.items() if name.startswith('event.')
+        }
+        work: dict[str, LatencyStats] = {name: s for name, s in stats.items() if not name.startswith('event.')}
+
+        out.family('exploration_events_total', 'counter', 'Handled journal events by type')
+        for event, s in sorted(events.items()):
+            out.sample('exploration_events_total', float(s.count), {'event': event})
+        out.summary(
+            'exploration_event_duration_seconds', 'Time to handle a journal event, by type', 'event', events
+        )
+        out.summary(
+            'exploration_work_duration_seconds', 'Time spent on valuation, persistence and rendering', 'work', work
+        )
+        out.metric(
+            'exploration_redraws_total', 'counter', 'Redraws of the body table',
+            float(stats['rendering'].count) if 'rendering' in stats else 0.0
+        )
+
+        written: int = (
+            helper.state_log.bytes_written if helper.state_log is not None else helper.persistence.bytes_written
+        )
+        out.metric('exploration_persist_bytes_total', 'counter', 'Bytes of state written', float(written))
+        out.metric(
+            'exploration_persist_writes_total', 'counter', 'Config keys written', float(helper.persistence.writes)
+        )
+
+        cache = helpers.valuation_cache
+        out.metric('exploration_valuation_cache_hits_total', 'counter', 'Valuation cache hits', float(cache.hits))
+        out.metric(
+            'exploration_valuation_cache_misses_total', 'counter', 'Valuation cache misses', float(cache.misses)
+        )
+        out.metric('exploration_valuation_cache_entries', 'gauge', 'Cached valuations', float(len(cache)))
+
+        out.metric(
+            'exploration_bodies', 'gauge', 'Bodies tracked in the current system', float(len(helper.system_bodies))
+        )
+        out.metric(
+            'exploration_bio_bodies', 'gauge', 'Bodies with bio signals in the current system',
+            float(sum(1 for scans in helper.bio_signs.values() if scans))
+        )
+        out.family('exploration_system_payout_millions', 'gauge', 'Possible payout range of the current system')
+        out.sample(
+            'exploration_system_payout_millions',
+            sum(body.value_min for body in helper.system_bodies.values()), {'bound': 'min'}
+        )
+        out.sample(
+            'exploration_system_payout_millions',
+            sum(body.value_max for body in helper.system_bodies.values()), {'bound': 'max'}
+        )
+        out.family('exploration_current_system_info', 'gauge', 'Name of the current system')
+        out.sample('exploration_current_system_info', 1.0, {'system': helper.current_system_name})
+        out.metric(
+            'exploration_last_update_timestamp_seconds', 'gauge', 'When these metrics were rendered', time.time()
+        )
+        return out.text()
+
+
+def test_render() -> None:
+    import logging
+    from explorationhelper import ExplorationHelper
+    from instrumentation import Instrumentation
+    from memoryconfig import MemoryConfig
+
+    helper: ExplorationHelper = ExplorationHelper(
+        logging.getLogger('pytest'), MemoryConfig(), instrumentation=Instrumentation()
+    )
+    helper.journal_event({"event": "FSDJump", "StarSystem": 'Quote "Me"'})
+    for body_id in (1, 2):
+        helper.journal_event({
+            "event": "Scan", "BodyName": f"Body {body_id}", "BodyID": body_id, "PlanetClass": "Earthlike body"
+        })
+    helper.persist()
+    text: str = MetricsExporter.render(helper)
+    lines: list[str] = text.splitlines()
+
+    assert 'exploration_events_total{event="Scan"} 2.0' in lines
+    assert 'exploration_events_total{event="FSDJump"} 1.0' in lines
+    assert 'exploration_event_duration_seconds_count{event="Scan"} 2.0' in lines
+    assert any(line.startswith('exploration_event_duration_seconds{event="Scan",quantile="0.95"} ') for line in lines)
+    assert 'exploration_work_duration_seconds_count{work="persistence"} 1.0' in lines
+    assert 'exploration_bodies 2.0' in lines
+    assert 'exploration_current_system_info{system="Quote \\"Me\\""} 1.0' in lines
+    payout: list[float] = [float(line.split()[-1]) for line in lines if line.startswith('exploration_system_payout')]
+    assert payout[0] == payout[1] > 1.0
+    assert not any(line.startswith('exploration_persist_bytes_total 0') for line in lines)
+
+    # every sample belongs to the family declared before it
+    family: str = ''
+    for line in lines:
+        if line.startswith('# TYPE '):
+            family = line.split()[2]
+        elif not line.startswith('#'):
+            assert line.startswith(family), line
+
+
+def test_export(tmp_path) -> None:
+    import logging
+    import urllib.request
+    from explorationhelper import ExplorationHelper
+    from instrumentation import Instrumentation
+    from memoryconfig import MemoryConfig
+
+    exporter: MetricsExporter = MetricsExporter(textfile=str(tmp_path / 'exploration.prom'), port=0, interval=60.0)
+    helper: ExplorationHelper = ExplorationHelper(
+        logging.getLogger('pytest'), MemoryConfig(), instrumentation=Instrumentation(), metrics=exporter
+    )
+    exporter.start()
+    try:
+        helper.journal_event({"event": "FSDJump", "StarSystem": "Test"})
+        assert not exporter.due(), "rendered on the first event"
+        helper.journal_event({"event": "Scan", "BodyName": "Test 1", "BodyID": 1, "PlanetClass": "Water world"})
+        with urllib.request.urlopen(f'http://127.0.0.1:{exporter.port}/metrics') as response:
+            assert response.headers['Content-Type'] == content_type
+            served: str = response.read().decode('utf-8')
+        assert 'exploration_bodies 0.0' in served.splitlines()
+        assert (tmp_path / 'exploration.prom').read_text(encoding='utf-8') == served
+
+        helper.shutdown()
+        assert exporter.server is None
+    finally:
+        exporter.stop()
+    assert 'exploration_bodies 1.0' in (tmp_path / 'exploration.prom').read_text(encoding='utf-8').splitlines(), \
+        "updated on shutdown"
+    assert [p.name for p in tmp_path.iterdir()] == ['exploration.prom']
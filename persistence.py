@@ -0,0 +1,112 @@
+from json import loads, dumps
+
+import helpers
+
+
+def copy_state(config: any) -> dict:
+    """Plain dict with the stored state, as persisted in the given config"""
+    return {
+        "explorationhelper.current_system": config.get_str("explorationhelper.current_system", default=""),
+        "explorationhelper.current_system_address": config.get_int(
+            "explorationhelper.current_system_address", default=0
+        ),
+        "explorationhelper.known_bodies": list(config.get_list("explorationhelper.known_bodies", default=[])),
+        "explorationhelper.known_bios": list(config.get_list("explorationhelper.known_bios", default=[])),
+    }
+
+
+class StatePersistence:
+    """
+    Write-behind storage of the current system state in the EDMC config.
+
+    Serialized bodies and scan lists are kept per body id, so only the bodies marked
+    as changed get serialized again, and a config key is only written if its content changed.
+    """
+    def __init__(self, config: any):
+        self.config: any = config
+        self.system_name: str = ""
+        self.system_address: int|None = None
+        self.bodies: dict[int, str] = {}
+        self.bios: dict[int, str] = {}
+        self.dirty: set[int] = set()
+        self.writes: int = 0
+        self.bytes_written: int = 0
+
+    def load_system_name(self) -> str:
+        self.system_name = self.config.get_str("explorationhelper.current_system", default="")
+        return self.system_name
+
+    def load_system_address(self) -> int|None:
+        # 0: not known
+        self.system_address = self.config.get_int("explorationhelper.current_system_address", default=0) or None
+        return self.system_address
+
+    def load_bodies(self) -> list[dict]:
+        res: list[dict] = []
+        for v in self.config.get_list("explorationhelper.known_bodies", default=[]):
+            data: dict = loads(v)
+            self.bodies[data.get("BodyID", 0)] = v
+            res.append(data)
+        return res
+
+    def load_bios(self) -> list[str]:
+        res: list[str] = list(self.config.get_list("explorationhelper.known_bios", default=[]))
+        for v in res:
+            self.bios[loads(v)["BodyID"]] = v
+        return res
+
+    def changed(self, body_id: int) -> None:
+        """Mark a body and/or its scan list as changed (or removed)"""
+        self.dirty.add(body_id)
+
+    def is_dirty(self, system_name: str, system_address: int|None = None) -> bool:
+        return bool(self.dirty) or system_name != self.system_name or system_address != self.system_address
+
+    @staticmethod
+    def update_entry(entries: dict[int, str], body_id: int, value: str|None) -> bool:
+        if value is None:
+            return entries.pop(body_id, None) is not None
+        if entries.get(body_id) == value:
+            return False
+        entries[body_id] = value
+        return True
+
+    def set(self, key: str, value: str|list[str]|int) -> None:
+        self.config.set(key, value)
+        self.writes += 1
+        if isinstance(value, int):
+            self.bytes_written += len(str(value))
+        else:
+            self.bytes_written += len(value) if isinstance(value, str) else sum(len(v) for v in value)
+
+    def write(
+            self, system_name: str, bodies: dict[int, 'Body'], bio_signs: dict[int, list['ScanResult']],
+            system_address: int|None = None
+    ) -> None:
+        """
+        Serialize everything marked as changed, and write the config keys whose content changed
+        """
+        if system_name != self.system_name:
+            self.system_name = system_name
+            self.set("explorationhelper.current_system", system_name)
+        if system_address != self.system_address:
+            self.system_address = system_address
+            self.set("explorationhelper.current_system_address", system_address or 0)
+
+        bodies_changed: bool = False
+        bios_changed: bool = False
+        for body_id in self.dirty:
+            bodies_changed |= self.update_entry(
+                self.bodies, body_id,
+                dumps(bodies[body_id].to_dict()) if body_id in bodies else None
+            )
+            bios_changed |= self.update_entry(
+                self.bios, body_id,
+                helpers.scans_to_str(body_id, bio_signs[body_id]) if body_id in bio_signs else None
+            )
+        self.dirty.clear()
+
+        if bodies_changed:
+            self.set("explorationhelper.known_bodies", list(self.bodies.values()))
+        if bios_changed:
+            self.set("explorationhelper.known_bios", list(self.bios.values()))
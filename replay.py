@@ -0,0 +1,332 @@
+"""
+Replay of journal archives without EDMC: every event of a directory of Journal.*.log files goes
+through the same dispatch as load.journal_entry, with no tk window and the state kept in memory.
+
+    python replay.py <journal directory> [--jobs N] [--history <sqlite file>] [--quiet]
+
+Prints the final valuation of every visited system, a summary per region and species, and the replay speed.
+With --jobs, the archive is cut into batches of whole systems (a jump empties the state, so systems are
+independent), which are replayed in worker processes; their partial reports are merged in archive order.
+"""
+import argparse
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from json import loads, JSONDecodeError
+
+from explorationhelper import ExplorationHelper
+from memoryconfig import MemoryConfig
+from scanresult import ScanResult
+
+
+class SystemValuation:
+    """Value range of a system when it was left (or when the replay ended)"""
+    def __init__(
+            self, name: str, region: str|None, bodies: int, bio_bodies: int, value_min: float, value_max: float
+    ):
+        self.name: str = name
+        self.region: str|None = region
+        self.bodies: int = bodies
+        self.bio_bodies: int = bio_bodies
+        self.value_min: float = value_min
+        self.value_max: float = value_max
+
+    def __str__(self) -> str:
+        value: str = (
+            f'{self.value_min:.0f} M' if self.value_min == self.value_max
+            else f'{self.value_min:.0f}-{self.value_max:.0f} M'
+        )
+        return f'{self.name}: {self.bodies} bodies, {self.bio_bodies} with bios, {value}'
+
+
+def journal_sort_key(file_name: str) -> str:
+    """
+    Journal files in chronological order: "Journal.2025-06-13T152813.01.log" sorts by its name,
+    the older "Journal.190613152813.01.log" format gets turned into the same form first
+    """
+    match = re.match(r'Journal\.(\d{2})(\d{2})(\d{2})(\d{6})\.(\d+)\.log$', file_name)
+    if match is None:
+        return file_name
+    yy, mm, dd, hms, part = match.groups()
+    return f'Journal.20{yy}-{mm}-{dd}T{hms}.{part}.log'
+
+
+def journal_files(directory: str) -> list[str]:
+    names: list[str] = [
+        name for name in os.listdir(directory)
+        if name.startswith('Journal.') and name.endswith('.log')
+    ]
+    return [os.path.join(directory, name) for name in sorted(names, key=journal_sort_key)]
+
+
+def parse_line(line: str) -> dict|None:
+    """One journal event, or None for empty or broken lines (e.g. after a game crash)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        entry: dict = loads(line)
+    except JSONDecodeError:
+        return None
+    return entry if 'event' in entry else None
+
+
+def read_journal(path: str) -> list[dict]:
+    """All events of one journal file"""
+    with open(path, encoding='utf-8') as f:
+        return [entry for entry in map(parse_line, f) if entry is not None]
+
+
+def system_batches(paths: list[str], batch_lines: int) -> iter:
+    """
+    Raw journal lines in batches of about <batch_lines>, always cut right before an FSDJump.
+    The check is a plain text search, so a batch may grow larger, but never starts within a system.
+    """
+    batch: list[str] = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if len(batch) >= batch_lines and '"event":"FSDJump"' in line:
+                    yield batch
+                    batch = []
+                batch.append(line)
+    if batch:
+        yield batch
+
+
+class ArchiveReport:
+    """
+    Results of replaying (part of) an archive. Reports of consecutive parts are merged with merge().
+    """
+    def __init__(self):
+        self.events: int = 0
+        self.systems: list[SystemValuation] = []
+        # region -> [systems, min payout, max payout]
+        self.regions: dict[str, list] = {}
+        # species -> number of bodies it was identified on
+        self.species: dict[str, int] = {}
+        # "<body>: <genus>" for genera without a known species matching that body
+        self.unresolved: list[str] = []
+
+    def add_system(self, valuation: SystemValuation, bodies: dict, bio_signs: dict[int, list[ScanResult]]) -> None:
+        self.systems.append(valuation)
+        region: list = self.regions.setdefault(valuation.region or 'unknown', [0, 0.0, 0.0])
+        region[0] += 1
+        region[1] += valuation.value_min
+        region[2] += valuation.value_max
+
+        for body_id, scans in bio_signs.items():
+            for scan in scans:
+                if scan.is_exact():
+                    self.species[scan.name] = self.species.get(scan.name, 0) + 1
+                elif scan.is_vague() and (scan.genus_id < 0 or scan.get_value_range()[0] in (0.0, 999.0)):
+                    # genus not in the catalog, or none of its known species fits this body
+                    name: str = bodies[body_id].name() if body_id in bodies else f'# {body_id}'
+                    self.unresolved.append(f'{name}: {scan.name}')
+
+    def merge(self, other: 'ArchiveReport') -> None:
+        """Add the results of <other>, which covers the part of the archive right after this one"""
+        self.events += other.events
+        self.systems.extend(other.systems)
+        for region, (systems, value_min, value_max) in other.regions.items():
+            mine: list = self.regions.setdefault(region, [0, 0.0, 0.0])
+            mine[0] += systems
+            mine[1] += value_min
+            mine[2] += value_max
+        for species, count in other.species.items():
+            self.species[species] = self.species.get(species, 0) + count
+        self.unresolved.extend(other.unresolved)
+
+
+class Replay:
+    def __init__(self, logger: logging.Logger, history_path: str|None = None):
+        self.helper: ExplorationHelper = ExplorationHelper(logger, MemoryConfig(), history_path=history_path)
+        self.report: ArchiveReport = ArchiveReport()
+        self.files: int = 0
+        self.seconds: float = 0.0
+
+    def system_valuation(self) -> SystemValuation:
+        helper: ExplorationHelper = self.helper
+        value_min: float = 0.0
+        value_max: float = 0.0
+        for body in helper.system_bodies.values():
+            value_min += body.value_min
+            value_max += body.value_max
+        return SystemValuation(
+            helper.current_system_name, helper.current_region, len(helper.system_bodies),
+            sum(1 for scans in helper.bio_signs.values() if scans), value_min, value_max
+        )
+
+    def end_system(self) -> None:
+        if self.helper.system_bodies:
+            self.helper.update_changed_values()
+            self.report.add_system(self.system_valuation(), self.helper.system_bodies, self.helper.bio_signs)
+
+    def feed(self, entry: dict) -> None:
+        if self.helper.leaves_system(entry):
+            # the jump empties the current system, so value it first
+            self.end_system()
+        self.helper.journal_event(entry)
+        self.report.events += 1
+
+    def run(self, paths: list[str]) -> None:
+        start: float = time.perf_counter()
+        for path in paths:
+            # one transaction per file: bodies are valued once per system, not once per event
+            with self.helper.batch():
+                for entry in read_journal(path):
+                    self.feed(entry)
+            self.files += 1
+        self.seconds += time.perf_counter() - start
+
+    def finish(self) -> None:
+        self.end_system()
+        self.helper.shutdown()
+
+    def events_per_second(self) -> float:
+        return self.report.events / self.seconds if self.seconds > 0 else 0.0
+
+
+def replay_batch(lines: list[str]) -> ArchiveReport:
+    """Worker process: replay one batch of whole systems from scratch"""
+    logger: logging.Logger = logging.getLogger('replay')
+    logger.setLevel(logging.ERROR)
+    replay: Replay = Replay(logger)
+    with replay.helper.batch():
+        for line in lines:
+            entry: dict|None = parse_line(line)
+            if entry is not None:
+                replay.feed(entry)
+    replay.finish()
+    return replay.report
+
+
+def replay_parallel(paths: list[str], jobs: int, batch_lines: int = 20000) -> ArchiveReport:
+    """
+    Replay the archive in <jobs> worker processes; same report as a serial replay.
+    Only a few batches per worker are in flight, so the archive is never held in memory as a whole.
+    """
+    report: ArchiveReport = ArchiveReport()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: deque[Future] = deque()
+        for batch in system_batches(paths, batch_lines):
+            pending.append(pool.submit(replay_batch, batch))
+            if len(pending) >= 2 * jobs:
+                report.merge(pending.popleft().result())
+        while pending:
+            report.merge(pending.popleft().result())
+    return report
+
+
+def print_report(report: ArchiveReport, quiet: bool) -> None:
+    if not quiet:
+        for system in report.systems:
+            print(system)
+        print()
+    for region, (systems, value_min, value_max) in sorted(report.regions.items()):
+        print(f'{region}: {systems} systems, {value_min:.0f}-{value_max:.0f} M')
+    print(f'{len(report.species)} species found, {len(report.unresolved)} genera without known species')
+    if not quiet:
+        for species, count in sorted(report.species.items()):
+            print(f'  {species}: {count}')
+        for unresolved in report.unresolved:
+            print(f'  (?) {unresolved}')
+
+
+def main(argv: list[str]|None = None) -> None:
+    parser = argparse.ArgumentParser(description='Replay Elite Dangerous journal files through the exploration helper')
+    parser.add_argument('directory', help='directory containing Journal.*.log files')
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--history', default=None, help='archive visited systems in this sqlite file')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary, not every system')
+    args = parser.parse_args(argv)
+    if args.history and args.jobs > 1:
+        parser.error('--history needs a serial replay (--jobs 1)')
+
+    paths: list[str] = journal_files(args.directory)
+    start: float = time.perf_counter()
+    if args.jobs > 1:
+        report: ArchiveReport = replay_parallel(paths, args.jobs)
+    else:
+        logger: logging.Logger = logging.getLogger('replay')
+        logger.setLevel(logging.ERROR)
+        replay: Replay = Replay(logger, args.history)
+        replay.run(paths)
+        replay.finish()
+        report = replay.report
+    seconds: float = time.perf_counter() - start
+
+    print_report(report, args.quiet)
+    print(
+        f'{len(paths)} files, {report.events} events in {seconds:.2f} s '
+        f'({report.events / max(seconds, 1e-9):.0f} events/s), {len(report.systems)} systems'
+    )
+
+
+def test_replay(tmp_path) -> None:
+    events: list[str] = [
+        '{"event":"Fileheader", "part":1}',
+        '{"event":"FSDJump", "StarSystem":"Smoje DF-Z d10", "SystemAddress":354494270091}',
+        '{"event":"Scan", "BodyName":"Smoje DF-Z d10 5 a", "BodyID":7, "SystemAddress":354494270091,'
+        ' "PlanetClass":"Rocky body", "TerraformState":"Terraformable", "WasMapped":false}',
+        '{"event":"FSDJump", "StarSystem":"Empty", "SystemAddress":1}',
+        '{"event":"Scan", "BodyName":"Empty 1", "BodyID":1, "SystemAddress":1,'
+        ' "PlanetClass":"Icy body", "WasMapped":true}',
+        '{"event":"Scan", "BodyName":"broken',
+    ]
+    (tmp_path / 'Journal.2025-06-13T152813.01.log').write_text('\n'.join(events[3:]))
+    (tmp_path / 'Journal.250612120000.01.log').write_text('\n'.join(events[:3]))
+    (tmp_path / 'other.txt').write_text('not a journal')
+
+    files: list[str] = journal_files(str(tmp_path))
+    assert [os.path.basename(f) for f in files] == [
+        'Journal.250612120000.01.log', 'Journal.2025-06-13T152813.01.log'
+    ]
+
+    replay: Replay = Replay(logging.getLogger('pytest'))
+    replay.run(files)
+    replay.finish()
+    assert replay.report.events == 5
+    assert [s.name for s in replay.report.systems] == ['Smoje DF-Z d10', 'Empty']
+    assert replay.report.systems[0].value_min > 1.0 and replay.report.systems[1].value_min < 1.0
+
+
+def test_replay_parallel(tmp_path) -> None:
+    lines: list[str] = []
+    for n in range(20):
+        lines += [
+            f'{{"event":"FSDJump", "StarSystem":"Sys {n}", "SystemAddress":{n}}}',
+            f'{{"event":"Scan", "BodyName":"Sys {n} 1", "BodyID":1, "SystemAddress":{n}, "PlanetClass":"Rocky body",'
+            f' "AtmosphereComposition":[{{"Name":"CarbonDioxide", "Percent":100.0}}], "Volcanism":"",'
+            f' "SurfaceTemperature":{150 + 5 * n}, "SurfaceGravity":0.5, "WasMapped":false}}',
+            f'{{"event":"SAASignalsFound", "BodyName":"Sys {n} 1", "BodyID":1, "SystemAddress":{n}, "Genuses":['
+            f'{{"Genus":"$Codex_Ent_Bacterial_Genus_Name;", "Genus_Localised":"Bacterium"}},'
+            f'{{"Genus":"$Codex_Ent_Unknown_Genus_Name;", "Genus_Localised":"Unknown"}}]}}',
+            '{"event":"CodexEntry", "Name":"$Codex_Ent_Bacterial_04_Yttrium_Name;",'
+            ' "Name_Localised":"Bacterium Acies - Aquamarine", "SubCategory":"$Codex_SubCategory_Organic_Structures;",'
+            f' "Region_Localised":"Region {n % 3}", "BodyID":1}}',
+        ]
+    (tmp_path / 'Journal.2025-06-13T152813.01.log').write_text('\n'.join(lines[:30]))
+    (tmp_path / 'Journal.2025-06-14T152813.01.log').write_text('\n'.join(lines[30:]))
+    files: list[str] = journal_files(str(tmp_path))
+
+    assert sum(len(batch) for batch in system_batches(files, 5)) == len(lines)
+    assert all('FSDJump' in batch[0] for batch in system_batches(files, 5))
+
+    serial: Replay = Replay(logging.getLogger('pytest'))
+    serial.run(files)
+    serial.finish()
+    parallel: ArchiveReport = replay_parallel(files, 2, batch_lines=10)
+
+    assert parallel.events == serial.report.events == len(lines)
+    assert [str(s) for s in parallel.systems] == [str(s) for s in serial.report.systems]
+    assert parallel.regions == serial.report.regions and len(parallel.regions) == 3
+    assert parallel.species == serial.report.species == {"Bacterium Acies": 20}
+    assert parallel.unresolved == serial.report.unresolved and len(parallel.unresolved) == 20
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+from biologial import Biological, species_index
 from helpers import get_value_range
 
 
@@ -5,6 +6,9 @@ class ScanResult:
     def __init__(self, signature_count: int, name: str = 'any'):
         self.signature_count: int = signature_count
         self.name: str = name
+        # interned ids from biologial.species_index(), -1 if not known
+        self.species_id: int = -1
+        self.genus_id: int = -1
 
     def genus(self) -> str:
         return "None"
@@ -54,21 +58,27 @@ class ScanResult:
         if name == "any":
             return ScanResult(count)
 
-        from biologial import all_bios
-        for b in all_bios:
-            if name == b.category:
-                return ScanFromOrbit(name, body)
-            if name == b.display_name():
-                res = ScanWithShipOrSuit(name)
-                res.signature_count = count
-                return res
+        index = species_index()
+        if name in index.genus_ids:
+            return ScanFromOrbit(name, body)
+        if name in index.species_ids:
+            res = ScanWithShipOrSuit(name)
+            res.signature_count = count
+            return res
         # should not reach here...
         return ScanResult(99)
 
 
 class ScanFromOrbit(ScanResult):
-    def __init__(self, genus: str, planet: dict):
+    def __init__(self, genus: str, planet: dict, symbol: str = ''):
+        index = species_index()
+        genus_id: int = index.resolve_genus(symbol, genus)
+        if genus_id >= 0:
+            # canonical name, independent of the game language
+            genus = index.genera[genus_id]
+
         super().__init__(1, genus)
+        self.genus_id = genus_id
         self.genus_name: str = genus
         self.min_value, self.max_value = get_value_range(genus, planet)
 
@@ -93,11 +103,18 @@ class ScanFromOrbit(ScanResult):
 
 
 class ScanWithShipOrSuit(ScanResult):
-    def __init__(self, species: str):
-        from biologial import Biological, get_bio_for_species
+    def __init__(self, species: str, symbol: str = ''):
+        index = species_index()
+        species_id: int = index.resolve_species(symbol, species)
+        if species_id >= 0:
+            self.bio: Biological = index.species[species_id]
+            species = self.bio.display_name()
+        else:
+            self.bio: Biological = Biological(species, '?', 999.0)
 
         super().__init__(0, species)
-        self.bio: Biological = get_bio_for_species(species)
+        self.species_id = species_id
+        self.genus_id = index.species_genus[species_id] if species_id >= 0 else -1
 
     def genus(self) -> str:
         return self.bio.category
@@ -121,15 +138,22 @@ class ScanWithShipOrSuit(ScanResult):
         # find some entry to update or replace
 
         for old_scan in result_list:
-            if old_scan.is_vague() and old_scan.name == self.genus():
+            if old_scan.is_vague() and self.same(old_scan.genus_id, self.genus_id, old_scan.name, self.genus()):
                 result_list.remove(old_scan)
                 result_list.insert(0, self)
                 return
             # that leaves only non-vagues
             if isinstance(old_scan, ScanWithShipOrSuit):
                 oss: ScanWithShipOrSuit = old_scan
-                if oss.name == self.name:
+                if self.same(oss.species_id, self.species_id, oss.name, self.name):
                     if self.signature_count:
                         oss.signature_count = self.signature_count
                     return
         result_list.append(self)
+
+    @staticmethod
+    def same(id_a: int, id_b: int, name_a: str, name_b: str) -> bool:
+        """Compare by interned id where known, by name for entries outside the catalog"""
+        if id_a >= 0 or id_b >= 0:
+            return id_a == id_b
+        return name_a == name_b
@@ -0,0 +1,116 @@
+import os
+from json import loads, dumps
+
+
+class StateLog:
+    """
+    Local, append-only log of the journal events that changed the plugin state,
+    plus a periodic snapshot of the full state.
+
+    Each record is one line "[seq, event]". The snapshot stores the sequence number of the
+    last event it contains, so after a crash between writing the snapshot and truncating the log,
+    the already contained events are skipped on load. A partially written last line is ignored.
+    """
+    snapshot_name: str = 'state.snapshot.json'
+    log_name: str = 'state.log.jsonl'
+
+    def __init__(self, directory: str, snapshot_every: int = 500):
+        self.directory: str = directory
+        self.snapshot_every: int = snapshot_every
+        self.seq: int = 0
+        self.records_since_snapshot: int = 0
+        self.log_file: any = None
+        # log records and snapshots written by this instance
+        self.bytes_written: int = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self) -> tuple[dict|None, list[dict]]:
+        """
+        Return the last snapshot (None if there is none) and the events recorded after it
+        """
+        snapshot: dict|None = None
+        if os.path.exists(self.path(self.snapshot_name)):
+            with open(self.path(self.snapshot_name), encoding='utf-8') as f:
+                snapshot = loads(f.read())
+            self.seq = snapshot.pop('seq')
+
+        tail: list[dict] = []
+        if os.path.exists(self.path(self.log_name)):
+            with open(self.path(self.log_name), 'rb+') as f:
+                valid_size: int = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('incomplete record')
+                        seq, entry = loads(line)
+                    except ValueError:
+                        # interrupted while writing the last record: cut it off, so appending continues cleanly
+                        f.truncate(valid_size)
+                        break
+                    valid_size += len(line)
+                    if seq > self.seq:
+                        tail.append(entry)
+                        self.seq = seq
+        self.records_since_snapshot = len(tail)
+        return snapshot, tail
+
+    def append(self, entry: dict) -> None:
+        if self.log_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.log_file = open(self.path(self.log_name), 'a', encoding='utf-8')
+        self.seq += 1
+        self.records_since_snapshot += 1
+        record: str = dumps([self.seq, entry], separators=(',', ':')) + '\n'
+        self.log_file.write(record)
+        self.log_file.flush()
+        self.bytes_written += len(record)
+
+    def needs_snapshot(self) -> bool:
+        return self.records_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, state: dict) -> None:
+        """
+        Atomically replace the snapshot with <state>, then start over with an empty log
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path: str = self.path(self.snapshot_name + '.tmp')
+        snapshot: str = dumps(dict(state, seq=self.seq), separators=(',', ':'))
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        self.bytes_written += len(snapshot)
+        os.replace(tmp_path, self.path(self.snapshot_name))
+
+        self.close()
+        self.log_file = open(self.path(self.log_name), 'w', encoding='utf-8')
+        self.records_since_snapshot = 0
+
+    def close(self) -> None:
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+
+def test_state_log(tmp_path) -> None:
+    log: StateLog = StateLog(str(tmp_path), snapshot_every=2)
+    assert log.load() == (None, [])
+
+    log.append({"event": "FSDJump", "StarSystem": "A"})
+    assert not log.needs_snapshot()
+    log.append({"event": "Scan", "BodyID": 1})
+    assert log.needs_snapshot()
+    log.write_snapshot({"current": "A"})
+    log.append({"event": "Scan", "BodyID": 2})
+    log.close()
+
+    # simulate a crash while writing the next record
+    with open(log.path(StateLog.log_name), 'a', encoding='utf-8') as f:
+        f.write('[4,{"event":"Sc')
+
+    reloaded: StateLog = StateLog(str(tmp_path))
+    assert reloaded.load() == ({"current": "A"}, [{"event": "Scan", "BodyID": 2}])
+    assert reloaded.seq == 3
+    reloaded.append({"event": "Scan", "BodyID": 3})
+    reloaded.close()
+    assert StateLog(str(tmp_path)).load()[1] == [{"event": "Scan", "BodyID": 2}, {"event": "Scan", "BodyID": 3}]
@@ -0,0 +1,314 @@
+"""
+Timing of the hot paths: valuation, (de-)serialization of scan lists and the redraw.
+
+    python tests/benchmark.py [--output benchmark.json] [--compare <older result file>] [--tolerance 1.5]
+
+Runs on a fixed synthetic corpus (seeded, so every run values the same bodies) plus the recorded
+events in tests/corpus. Results go to a JSON file; with --compare, every measurement slower than
+<tolerance> times the older result is reported, and the exit code is 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_tkinter as tk
+import helpers
+from body import Body
+from explorationhelper import ExplorationHelper
+from memoryconfig import MemoryConfig
+from scanresult import ScanResult, ScanFromOrbit, ScanWithShipOrSuit
+
+corpus_dir: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+planet_classes: list[str] = [
+    'Rocky body', 'High metal content body', 'Icy body', 'Rocky ice body', 'Metal rich body', 'Water world'
+]
+gases: list[str] = [
+    'CarbonDioxide', 'SulphurDioxide', 'Water', 'Ammonia', 'Argon', 'Neon', 'Nitrogen', 'Oxygen', 'Methane', 'Helium'
+]
+volcanism: list[str] = ['', '', '', 'minor water magma volcanism', 'silicate vapour geysers volcanism']
+genera: list[tuple[str, str]] = [
+    ('Bacterial', 'Bacterium'), ('Conchas', 'Concha'), ('Osseus', 'Osseus'), ('Stratum', 'Stratum'),
+    ('Fungoids', 'Fungoida'), ('Tussocks', 'Tussock'), ('Shrubs', 'Frutexa'), ('Cactoid', 'Cactoida'),
+]
+
+
+def synthetic_events(systems: int, seed: int = 20250613) -> list[dict]:
+    """FSDJump, Scan, FSSBodySignals and SAASignalsFound events of <systems> systems with 12 bodies each"""
+    rnd: random.Random = random.Random(seed)
+    events: list[dict] = []
+    for system in range(systems):
+        name: str = f'Synthetic {system}'
+        events.append({"event": "FSDJump", "StarSystem": name, "SystemAddress": system})
+        for body_id in range(1, 13):
+            body_name: str = f'{name} {body_id}'
+            events.append({
+                "event": "Scan", "BodyName": body_name, "BodyID": body_id, "SystemAddress": system,
+                "PlanetClass": rnd.choice(planet_classes),
+                "TerraformState": "Terraformable" if rnd.random() < 0.1 else "",
+                "AtmosphereComposition": [
+                    {"Name": gas, "Percent": 100.0 / n}
+                    for n, gas in enumerate(rnd.sample(gases, rnd.randint(1, 3)), start=1)
+                ],
+                "Volcanism": rnd.choice(volcanism),
+                "SurfaceTemperature": rnd.uniform(20.0, 500.0),
+                "SurfaceGravity": rnd.uniform(0.02, 4.0),
+                "Periapsis": rnd.uniform(0.0, 360.0),
+                "WasDiscovered": rnd.random() < 0.5,
+                "WasMapped": rnd.random() < 0.2,
+            })
+            if rnd.random() < 0.4:
+                signals: list[tuple[str, str]] = rnd.sample(genera, rnd.randint(1, 4))
+                events.append({
+                    "event": "FSSBodySignals", "BodyName": body_name, "BodyID": body_id, "SystemAddress": system,
+                    "Signals": [
+                        {"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": len(signals)}
+                    ]
+                })
+                events.append({
+                    "event": "SAASignalsFound", "BodyName": body_name, "BodyID": body_id, "SystemAddress": system,
+                    "Genuses": [
+                        {"Genus": f"$Codex_Ent_{symbol}_Genus_Name;", "Genus_Localised": genus}
+                        for symbol, genus in signals
+                    ]
+                })
+    return events
+
+
+def recorded_events() -> list[dict]:
+    with open(os.path.join(corpus_dir, 'recorded.jsonl'), encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def measure(func: callable, min_seconds: float) -> tuple[int, float]:
+    """Call <func> until min_seconds have passed; return (calls, seconds)"""
+    calls: int = 0
+    start: float = time.perf_counter()
+    elapsed: float = 0.0
+    while calls == 0 or elapsed < min_seconds:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+class Benchmark:
+    def __init__(self, systems: int = 50, min_seconds: float = 0.2):
+        self.min_seconds: float = min_seconds
+        self.events: list[dict] = synthetic_events(systems) + recorded_events()
+        self.scans: list[dict] = [e for e in self.events if e['event'] == 'Scan']
+        self.bodies: list[Body] = [Body(scan) for scan in self.scans]
+        self.genus_scans: list[tuple[str, Body]] = [
+            (genus['Genus_Localised'], self.bodies_by_name()[e['BodyName']])
+            for e in self.events if e['event'] == 'SAASignalsFound'
+            for genus in e['Genuses']
+        ]
+        self.results: dict[str, dict] = {}
+
+    def bodies_by_name(self) -> dict[str, Body]:
+        return {body['BodyName']: body for body in self.bodies}
+
+    def record(self, name: str, func: callable, items: int) -> None:
+        """Time <func>, which handles <items> items per call"""
+        calls, seconds = measure(func, self.min_seconds)
+        self.results[name] = {
+            "items": items,
+            "calls": calls,
+            "us_per_item": seconds / calls / max(items, 1) * 1e6,
+        }
+
+    def valuation(self) -> None:
+        def value_genera() -> None:
+            for genus, body in self.genus_scans:
+                helpers.get_value_range(genus, body)
+
+        def value_genera_cold() -> None:
+            helpers.valuation_cache.clear()
+            value_genera()
+
+        self.record('get_value_range', value_genera, len(self.genus_scans))
+        self.record('get_value_range.cold', value_genera_cold, len(self.genus_scans))
+
+        for count in range(1, 11):
+            def value_anonymous() -> None:
+                for body in self.bodies:
+                    helpers.get_value_range_anonymous(body, count)
+
+            self.record(f'get_value_range_anonymous.{count}', value_anonymous, len(self.bodies))
+
+        scan_lists: list[list[ScanResult]] = [self.scan_list(body) for body in self.bodies]
+
+        def value_str() -> None:
+            for body, scans in zip(self.bodies, scan_lists):
+                body.value_range_str(scans)
+
+        self.record('Body.value_range_str', value_str, len(self.bodies))
+        self.record('Body.__init__', lambda: [Body(scan) for scan in self.scans], len(self.scans))
+
+    def scan_list(self, body: Body) -> list[ScanResult]:
+        return [
+            ScanResult(3),
+            ScanFromOrbit('Bacterium', body),
+            ScanFromOrbit('Stratum', body),
+            ScanWithShipOrSuit('Concha Biconcavis'),
+        ]
+
+    def serialization(self) -> None:
+        system_bodies: dict[int, Body] = {n: body for n, body in enumerate(self.bodies)}
+        stored: list[str] = [
+            helpers.scans_to_str(n, self.scan_list(body)) for n, body in system_bodies.items()
+        ]
+
+        def to_str() -> None:
+            for n, body in system_bodies.items():
+                helpers.scans_to_str(n, self.scan_list(body))
+
+        def from_str() -> None:
+            helpers.str_to_scans(stored, system_bodies)
+
+        self.record('scans_to_str', to_str, len(stored))
+        self.record('str_to_scans', from_str, len(stored))
+
+    def redraw(self) -> None:
+        helper: ExplorationHelper = ExplorationHelper(logging.getLogger('benchmark'), MemoryConfig(), tk)
+        helper.logger.setLevel(logging.ERROR)
+        helper.ensure_loaded()
+        # one big system: all bodies of the corpus under their own ids
+        helper.register_system({"event": "FSDJump", "StarSystem": "Benchmark"})
+        for n, scan in enumerate(self.scans):
+            helper.register_body_scan(dict(scan, BodyID=n))
+            helper.bio_signs[n] = self.scan_list(helper.system_bodies[n])
+            helper.update_value(n)
+        helper.frame_init(tk.Widget())
+        tk.pending_after.clear()
+        rows: int = len(helper.view_rows())
+
+        def full_redraw() -> None:
+            helper.renderer.clear()
+            helper.frame_redraw()
+
+        tk.reset_operations()
+        full_redraw()
+        self.results['widgets.full_redraw'] = dict(tk.operations)
+        self.record('frame_redraw.full', full_redraw, rows)
+
+        tk.reset_operations()
+        helper.frame_redraw()
+        self.results['widgets.unchanged_redraw'] = dict(tk.operations)
+        self.record('frame_redraw.unchanged', helper.frame_redraw, rows)
+
+    def imports(self) -> None:
+        """
+        Time to import the plugin modules in a fresh interpreter, as EDMC does on startup.
+        tkinter and logging are loaded by EDMC anyway; bytecode is cached in a temporary directory,
+        the first run fills the cache and the second one is measured.
+        """
+        import subprocess
+        import tempfile
+
+        root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code: str = (
+            'import time, tkinter, logging; t = time.perf_counter(); import explorationhelper;'
+            ' print(time.perf_counter() - t)'
+        )
+        with tempfile.TemporaryDirectory() as cache:
+            env: dict = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+            env.pop('PYTHONDONTWRITEBYTECODE', None)
+            for _ in range(2):
+                out: str = subprocess.run(
+                    [sys.executable, '-c', code], cwd=root, env=env, capture_output=True, text=True, check=True
+                ).stdout
+        self.results['import.explorationhelper'] = {"items": 1, "calls": 1, "us_per_item": float(out) * 1e6}
+
+    def startup(self) -> None:
+        """Plugin start with a stored system of all corpus bodies: construction, and the deferred load"""
+        config: MemoryConfig = MemoryConfig()
+        stored: ExplorationHelper = ExplorationHelper(logging.getLogger('benchmark'), config, tk)
+        stored.ensure_loaded()
+        for n, scan in enumerate(self.scans):
+            stored.register_body_scan(dict(scan, BodyID=n))
+            stored.bio_signs[n] = self.scan_list(stored.system_bodies[n])
+            stored.persistence.changed(n)
+        stored.persist()
+
+        self.record(
+            'startup.construct',
+            lambda: ExplorationHelper(logging.getLogger('benchmark'), config, tk), 1
+        )
+        self.record(
+            'startup.ensure_loaded',
+            lambda: ExplorationHelper(logging.getLogger('benchmark'), config, tk).ensure_loaded(), len(self.scans)
+        )
+
+    def run(self) -> dict:
+        self.valuation()
+        self.serialization()
+        self.redraw()
+        self.startup()
+        self.imports()
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "bodies": len(self.bodies),
+            "results": self.results,
+        }
+
+
+def regressions(current: dict, older: dict, tolerance: float) -> list[str]:
+    res: list[str] = []
+    for name, result in current["results"].items():
+        if name not in older["results"]:
+            continue
+        old: dict = older["results"][name]
+        if "us_per_item" in result:
+            if result["us_per_item"] > old["us_per_item"] * tolerance:
+                res.append(f'{name}: {old["us_per_item"]:.2f} -> {result["us_per_item"]:.2f} us')
+        elif result != old:
+            # widget counts are exact
+            res.append(f'{name}: {old} -> {result}')
+    return res
+
+
+def main(argv: list[str]|None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the valuation and redraw hot paths')
+    parser.add_argument('--output', default='benchmark.json', help='write results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON file of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed slowdown factor')
+    parser.add_argument('--systems', type=int, default=50, help='size of the synthetic corpus')
+    args = parser.parse_args(argv)
+
+    result: dict = Benchmark(args.systems).run()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    for name, values in result["results"].items():
+        print(f'{name:40} {values}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            found: list[str] = regressions(result, json.load(f), args.tolerance)
+        for line in found:
+            print(f'REGRESSION {line}')
+        return 1 if found else 0
+    return 0
+
+
+def test_benchmark(tmp_path) -> None:
+    result: dict = Benchmark(systems=2, min_seconds=0.0).run()
+    assert "get_value_range_anonymous.10" in result["results"]
+    assert result["results"]["widgets.unchanged_redraw"] == {'create': 0, 'destroy': 0, 'configure': 0, 'grid': 0}
+    assert regressions(result, result, 1.0) == []
+
+    slower: dict = json.loads(json.dumps(result))
+    slower["results"]["scans_to_str"]["us_per_item"] /= 2
+    assert regressions(result, slower, 1.5) and not regressions(result, slower, 2.5)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Differential check of the valuation engines against the reference semantics, with relative speed.
+
+    python tests/differential.py [--bodies 5000] [--seed 1] [--show 5]
+
+The reference is the plain loop over the catalog with Biological.can_grow_on, as helpers used to do it;
+its quirks are part of the contract: a missing Scan field accepts everything, an unknown genus is (1, 999),
+a known genus that can not grow on the body is (0, 0), and an empty body description filters nothing.
+Every engine in <engines> is run on the same bodies, which are generated from the filter breakpoints and
+names in the catalog. Mismatches are printed, and the exit code is 1 if there are any.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helpers
+from biologial import Atmosphere, Biological, Planet, RangeFilter, Volcanism, eligibility_index, species_catalog
+from body import Body
+
+# per body: value range of each genus, and the anonymous value range for each signal count
+Valuation = tuple[tuple[tuple[float, float], ...], tuple[tuple[float, float], ...]]
+
+unknown_genus: str = 'Unknownia'
+signal_counts: tuple[int, ...] = (1, 2, 3, 5, 10)
+
+
+def reference_value_range(catalog: list[Biological], genus_name: str, body_info: dict|None) -> tuple[float, float]:
+    min_value: float = 999.0
+    max_value: float = 0.0
+    genus_known: bool = False
+
+    for b in catalog:
+        if b.category != genus_name:
+            continue
+        genus_known = True
+        if body_info and not b.can_grow_on(body_info):
+            continue
+        max_value = max(max_value, b.net_worth)
+        min_value = min(min_value, b.net_worth)
+
+    if min_value == 999.0:
+        return (0.0, 0.0) if genus_known else (1.0, 999.0)
+    return min_value, max_value
+
+
+def reference_value_range_anonymous(catalog: list[Biological], body: dict|None, count: int) -> tuple[float, float]:
+    genus_value_ranges: list[tuple[float, float]] = []
+    for genus in {b.category for b in catalog}:
+        mn, mx = reference_value_range(catalog, genus, body)
+        if mn == 0.0:
+            # genus can not grow on that planet
+            continue
+        genus_value_ranges.append((mn, mx))
+
+    if not genus_value_ranges:
+        return 0.0, 0.0
+    genus_value_ranges.sort(key=lambda v: v[0])
+    min_value: float = sum([v[0] for v in genus_value_ranges[:count]])
+    genus_value_ranges.sort(key=lambda v: v[1])
+    max_value: float = sum([v[1] for v in genus_value_ranges[-count:]])
+    return min_value, max_value
+
+
+def reference_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    catalog: list[Biological] = species_catalog().bios
+    return [
+        (
+            tuple(reference_value_range(catalog, genus, body) for genus in genera),
+            tuple(reference_value_range_anonymous(catalog, body, count) for count in signal_counts)
+        )
+        for body in bodies
+    ]
+
+
+def index_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    """The compiled EligibilityIndex, without any caching"""
+    index = eligibility_index()
+    res: list[Valuation] = []
+    for body in bodies:
+        ranges: dict[str, tuple[float, float]] = index.genus_ranges(body)
+        res.append((
+            tuple(index.value_range(genus, body) for genus in genera),
+            tuple(helpers.value_range_anonymous(ranges, count) for count in signal_counts)
+        ))
+    return res
+
+
+def helpers_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    """What the plugin calls, including the valuation cache"""
+    helpers.valuation_cache.clear()
+    return [
+        (
+            tuple(helpers.get_value_range(genus, body) for genus in genera),
+            tuple(helpers.get_value_range_anonymous(body, count) for count in signal_counts)
+        )
+        for body in bodies
+    ]
+
+
+def body_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    """Like helpers_engine, on Body objects (interned strings, atmosphere as a set of gas names)"""
+    return helpers_engine([Body(body) if body is not None else None for body in bodies], genera)
+
+
+def batch_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    """batchvaluation with NumPy (see requirements.txt), with the unknown genus rule of helpers.get_value_range"""
+    from batchvaluation import value_bodies
+
+    valuation = value_bodies([body or {} for body in bodies])
+    anonymous: list[list[tuple[float, float]]] = [valuation.anonymous(count) for count in signal_counts]
+    res: list[Valuation] = []
+    for n in range(len(bodies)):
+        ranges: dict[str, tuple[float, float]] = valuation.ranges(n)
+        res.append((
+            tuple(ranges.get(genus, (1.0, 999.0)) for genus in genera),
+            tuple(per_count[n] for per_count in anonymous)
+        ))
+    return res
+
+
+def batch_python_engine(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+    """batchvaluation without NumPy, as in EDMC"""
+    import batchvaluation
+
+    numpy = batchvaluation.numpy
+    batchvaluation.numpy = None
+    try:
+        return batch_engine(bodies, genera)
+    finally:
+        batchvaluation.numpy = numpy
+
+
+# candidate engines, checked against reference_engine; add new ones here
+engines: dict[str, callable] = {
+    'index': index_engine,
+    'helpers': helpers_engine,
+    'body': body_engine,
+    'batch': batch_engine,
+    'batch-python': batch_python_engine,
+}
+
+
+def field_values(catalog: list[Biological]) -> dict[str, list]:
+    """
+    Interesting values per Scan field: every range limit with its closest neighbours and the midpoints
+    between limits, the names the filters look for (plus some they do not know)
+    """
+    limits: dict[str, set[float]] = {}
+    names: dict[type, set[str]] = {Atmosphere: set(), Volcanism: set(), Planet: set()}
+    for bio in catalog:
+        for clause in bio.clauses():
+            for f in clause:
+                if isinstance(f, RangeFilter):
+                    limits.setdefault(f.key, set()).update((f.min, f.max))
+                else:
+                    names[type(f)].add(f.required)
+
+    values: dict[str, list] = {}
+    for key, found in limits.items():
+        points: list[float] = sorted(found)
+        probes: set[float] = {-1.0, points[-1] * 10}
+        for limit in points:
+            probes.update((limit, math.nextafter(limit, -math.inf), math.nextafter(limit, math.inf)))
+        probes.update((a + b) / 2 for a, b in zip(points, points[1:]))
+        values[key] = sorted(probes)
+
+    values[Atmosphere.key] = sorted(names[Atmosphere]) + ['Unobtainium']
+    values[Volcanism.key] = [''] + sorted(
+        variant
+        for required in names[Volcanism] - {'None'}
+        for variant in (required, f'minor {required} magma volcanism', f'major {required} geysers volcanism')
+    ) + ['unknown volcanism']
+    values[Planet.key] = sorted(
+        variant
+        for required in names[Planet]
+        for variant in (required, f'{required} body', f'{required} ice body')
+    ) + ['Water world', 'Gas giant with water based life']
+    return values
+
+
+def generate_bodies(count: int, seed: int) -> list[dict|None]:
+    """
+    The trivial bodies, every interesting value on its own, and random combinations up to <count> bodies;
+    each field is left out now and then, since a missing field must not filter anything
+    """
+    rnd: random.Random = random.Random(seed)
+    values: dict[str, list] = field_values(species_catalog().bios)
+    gases: list[str] = values.pop(Atmosphere.key)
+
+    def atmosphere(names: list[str]) -> list[dict]:
+        return [{"Name": gas, "Percent": 100.0 / len(names)} for gas in names]
+
+    bodies: list[dict|None] = [None, {}, {"BodyName": "nothing known"}, {Atmosphere.key: []}]
+    bodies += [{Atmosphere.key: atmosphere([gas])} for gas in gases]
+    bodies += [{key: value} for key, choices in values.items() for value in choices]
+    while len(bodies) < count:
+        body: dict = {
+            key: rnd.choice(choices)
+            for key, choices in values.items()
+            if rnd.random() < 0.85
+        }
+        if rnd.random() < 0.85:
+            body[Atmosphere.key] = atmosphere(rnd.sample(gases, rnd.randint(0, 3)))
+        bodies.append(body)
+    return bodies
+
+
+def compare(
+        bodies: list[dict|None], genera: list[str], expected: list[Valuation], found: list[Valuation]
+) -> list[str]:
+    res: list[str] = []
+    if len(found) != len(expected):
+        return [f'{len(found)} results for {len(expected)} bodies']
+    for body, (want_ranges, want_anonymous), (got_ranges, got_anonymous) in zip(bodies, expected, found):
+        for genus, want, got in zip(genera, want_ranges, got_ranges):
+            if want != got:
+                res.append(f'{genus} on {body}: {got}, expected {want}')
+        for count, want, got in zip(signal_counts, want_anonymous, got_anonymous):
+            if want != got:
+                res.append(f'{count} unknown signals on {body}: {got}, expected {want}')
+    return res
+
+
+def run(bodies: list[dict|None], candidates: dict[str, callable]) -> dict[str, dict]:
+    """Per engine: the mismatches, its run time, and its speed relative to the reference"""
+    genera: list[str] = sorted({bio.category for bio in species_catalog().bios}) + [unknown_genus]
+    start: float = time.perf_counter()
+    expected: list[Valuation] = reference_engine(bodies, genera)
+    reference_seconds: float = time.perf_counter() - start
+
+    results: dict[str, dict] = {}
+    for name, engine in candidates.items():
+        start = time.perf_counter()
+        try:
+            found: list[Valuation] = engine(bodies, genera)
+        except ImportError as e:
+            # optional dependency of that engine not installed
+            results[name] = {"skipped": str(e)}
+            continue
+        seconds: float = time.perf_counter() - start
+        results[name] = {
+            "mismatches": compare(bodies, genera, expected, found),
+            "seconds": seconds,
+            "speedup": reference_seconds / seconds if seconds > 0 else math.inf,
+        }
+    return results
+
+
+def main(argv: list[str]|None = None) -> int:
+    parser = argparse.ArgumentParser(description='Check valuation engines against the reference implementation')
+    parser.add_argument('--bodies', type=int, default=5000, help='number of generated bodies')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the random combinations')
+    parser.add_argument('--show', type=int, default=5, help='mismatches printed per engine')
+    args = parser.parse_args(argv)
+
+    bodies: list[dict|None] = generate_bodies(args.bodies, args.seed)
+    failed: bool = False
+    for name, result in run(bodies, engines).items():
+        if "skipped" in result:
+            print(f'{name:10} skipped: {result["skipped"]}')
+            continue
+        mismatches: list[str] = result["mismatches"]
+        failed = failed or bool(mismatches)
+        print(
+            f'{name:12} {len(mismatches):6} mismatches  {result["seconds"] * 1000:9.1f} ms'
+            f'  {result["speedup"]:7.1f}x reference'
+        )
+        for line in mismatches[:args.show]:
+            print(f'    {line}')
+    return 1 if failed else 0
+
+
+def test_differential() -> None:
+    bodies: list[dict|None] = generate_bodies(300, seed=7)
+    for name, result in run(bodies, engines).items():
+        assert result.get("mismatches", []) == [], name
+
+    def ignores_missing_fields(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+        # a body without temperature is treated as 0 K
+        return index_engine([dict(body or {}, SurfaceTemperature=0.0) for body in bodies], genera)
+
+    def no_unknown_sentinel(bodies: list[dict|None], genera: list[str]) -> list[Valuation]:
+        return [
+            (tuple((0.0, 0.0) if r == (1.0, 999.0) else r for r in ranges), anonymous)
+            for ranges, anonymous in index_engine(bodies, genera)
+        ]
+
+    broken: dict[str, dict] = run(bodies[:100], {"missing": ignores_missing_fields, "sentinel": no_unknown_sentinel})
+    assert broken["missing"]["mismatches"] and broken["sentinel"]["mismatches"]
+    assert all(unknown_genus in line for line in broken["sentinel"]["mismatches"])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
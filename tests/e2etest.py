@@ -7,6 +7,7 @@ from fake_config import FakeConfig
 from explorationhelper import ExplorationHelper
 from scanresult import ScanResult, ScanFromOrbit
 from body import Body
+from history import HistoryStore
 
 
 class MyTestCase(unittest.TestCase):
@@ -40,6 +41,7 @@ class MyTestCase(unittest.TestCase):
             }
             """
         ))
+        MyTestCase.dut.flush()
         master.print_recursive()
 
 
@@ -74,6 +76,8 @@ def test_value_range():
     # picked a bad planet for this, it only supports two bacteria and one fonticulua
     assert body.value_range_str([ScanResult(1)]) == '[1-19 M]'
     assert body.value_range_str([ScanResult(2)]) == '[20-21 M]'
+    # stored from the last evaluation
+    assert body.value_range_str() == '[20-21 M]'
 
 
 class TestGravityFilter:
@@ -112,3 +116,431 @@ class TestGravityFilter:
     def test_clypeus(self):
         assert ScanFromOrbit("Clypeus", self.body).get_value_range() == (8.4, 11.9), """
             Two of the Clypeus; not sure about the distance-filtered one."""
+
+
+def fresh_helper() -> ExplorationHelper:
+    config: FakeConfig = FakeConfig()
+    config.data = {}
+    tk.pending_after.clear()
+    return ExplorationHelper(logging.getLogger("pytest"), config, tk)
+
+
+def test_incremental_redraw():
+    dut: ExplorationHelper = fresh_helper()
+    master: tk.Widget = tk.Widget()
+    dut.frame_init(master)
+
+    for body_id in range(1, 6):
+        dut.register_signal_count({
+            "event": "FSSBodySignals", "BodyName": f"Test {body_id}", "BodyID": body_id,
+            "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": body_id}]
+        })
+    # five events, coalesced into one scheduled redraw (and one config write)
+    assert dut.redraw_pending
+    assert [func for _, func in tk.pending_after] == [dut.persist, dut.flush]
+    tk.run_after()
+    assert not dut.redraw_pending
+    # five rows: name, value and one signal count label each
+    assert len(dut.tk_frame.winfo_children()) == 15
+
+    tk.reset_operations()
+    dut.frame_redraw()
+    assert tk.operations == {'create': 0, 'destroy': 0, 'configure': 0, 'grid': 0}, "nothing changed"
+
+    dut.register_detail_scan({
+        "event": "SAASignalsFound", "BodyName": "Test 3", "BodyID": 3,
+        "Genuses": [
+            {"Genus": "$Codex_Ent_Bacterial_Genus_Name;", "Genus_Localised": "Bacterium"},
+            {"Genus": "$Codex_Ent_Conchas_Genus_Name;", "Genus_Localised": "Concha"},
+            {"Genus": "$Codex_Ent_Osseus_Genus_Name;", "Genus_Localised": "Osseus"}
+        ]
+    })
+    dut.flush()
+    # only row 3 changed: new value, one relabelled and two additional genus cells
+    assert tk.operations == {'create': 2, 'destroy': 0, 'configure': 2, 'grid': 2}
+    assert len(dut.tk_frame.winfo_children()) == 17
+
+
+def test_write_behind():
+    dut: ExplorationHelper = fresh_helper()
+    dut.frame_init(tk.Widget())
+    dut.register_system({"event": "FSDJump", "StarSystem": "Test"})
+    for body_id in (1, 2):
+        dut.register_signal_count({
+            "event": "FSSBodySignals", "BodyName": f"Test {body_id}", "BodyID": body_id,
+            "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+        })
+    assert dut.config.data == {}, "nothing written before the timer fires"
+
+    tk.run_after()
+    assert dut.config.data["explorationhelper.current_system"] == "Test"
+    assert len(dut.config.data["explorationhelper.known_bodies"]) == 2
+    assert len(dut.config.data["explorationhelper.known_bios"]) == 2
+    writes: int = dut.persistence.writes
+
+    dut.register_organic({
+        "event": "ScanOrganic", "ScanType": "Log", "Species_Localised": "Bacterium Acies", "Body": 2
+    })
+    dut.shutdown()
+    assert dut.persistence.writes == writes + 1, "only the scan list changed"
+    assert "Bacterium Acies" in dut.config.data["explorationhelper.known_bios"][1]
+
+    reloaded: ExplorationHelper = ExplorationHelper(logging.getLogger("pytest"), dut.config, tk)
+    assert not reloaded.system_bodies, "loaded on first use only"
+    reloaded.journal_event({"event": "Music", "MusicTrack": "Exploration"})
+    assert not reloaded.loaded
+    reloaded.frame_init(tk.Widget())
+    assert sorted(reloaded.system_bodies) == [1, 2]
+    assert [s.name for s in reloaded.bio_signs[2]] == ["any", "Bacterium Acies"]
+
+
+def test_state_log(tmp_path):
+    def new_helper() -> ExplorationHelper:
+        config: FakeConfig = FakeConfig()
+        config.data = {}
+        helper: ExplorationHelper = ExplorationHelper(logging.getLogger("pytest"), config, tk, state_dir=str(tmp_path))
+        helper.ensure_loaded()
+        return helper
+
+    dut: ExplorationHelper = new_helper()
+    dut.journal_event({"event": "FSDJump", "StarSystem": "Test"})
+    dut.journal_event({
+        "event": "FSSBodySignals", "BodyName": "Test 1", "BodyID": 1,
+        "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+    })
+    dut.journal_event({
+        "event": "ScanOrganic", "ScanType": "Log", "Species_Localised": "Bacterium Acies", "Body": 1
+    })
+    dut.journal_event({"event": "Music", "MusicTrack": "Exploration"})
+    # handled, but nothing new for us
+    dut.journal_event({"event": "FSSBodySignals", "BodyName": "Test 2", "BodyID": 2, "Signals": []})
+    dut.journal_event({"event": "SAASignalsFound", "BodyName": "Test 2", "BodyID": 2, "Signals": []})
+    dut.journal_event({
+        "event": "CodexEntry", "Name_Localised": "Earth-like world", "BodyID": 2,
+        "SubCategory": "$Codex_SubCategory_Terrestrials;"
+    })
+    assert dut.state_log.records_since_snapshot == 2, "snapshot at the jump, then one record per changing event"
+    assert dut.config.data == {}, "EDMC config is not used with a state log"
+
+    # no shutdown: the state is recovered from snapshot and log
+    recovered: ExplorationHelper = new_helper()
+    assert recovered.current_system_name == "Test"
+    assert [s.name for s in recovered.bio_signs[1]] == ["any", "Bacterium Acies"]
+    dut.state_log.close()
+
+    recovered.shutdown()
+    assert new_helper().state_log.records_since_snapshot == 0
+    assert [s.name for s in new_helper().bio_signs[1]] == ["any", "Bacterium Acies"]
+
+    # a carrier jump to another system compacts the log like an FSDJump
+    carried: ExplorationHelper = new_helper()
+    carried.journal_event({"event": "CarrierJump", "StarSystem": "Other", "SystemAddress": 2})
+    assert carried.state_log.records_since_snapshot == 0 and not carried.system_bodies
+    carried.state_log.close()
+
+
+def test_history():
+    dut: ExplorationHelper = fresh_helper()
+    dut.history = HistoryStore(':memory:')
+    dut.register_system({"event": "FSDJump", "StarSystem": "First", "SystemAddress": 1})
+    dut.register_signal_count({
+        "event": "FSSBodySignals", "BodyName": "First 1", "BodyID": 1,
+        "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+    })
+    dut.register_system({"event": "FSDJump", "StarSystem": "Second", "SystemAddress": 2})
+    assert not dut.system_bodies, "only the current system is kept in memory"
+    assert dut.history.unfinished_bodies(10.0) == [("First", "First 1", 38.0)]
+
+
+def test_history_after_restart():
+    dut: ExplorationHelper = fresh_helper()
+    dut.journal_event({"event": "FSDJump", "StarSystem": "First", "SystemAddress": 1})
+    dut.journal_event({
+        "event": "FSSBodySignals", "BodyName": "First 1", "BodyID": 1, "SystemAddress": 1,
+        "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+    })
+    dut.shutdown()
+    assert dut.config.data["explorationhelper.current_system_address"] == 1
+
+    # after a restart, the system whose bodies are all stubs can still be archived
+    restarted: ExplorationHelper = ExplorationHelper(logging.getLogger("pytest"), dut.config, tk)
+    restarted.ensure_loaded()
+    restarted.history = HistoryStore(':memory:')
+    assert restarted.system_address() == 1
+    restarted.current_system_address = None
+    assert restarted.system_address() == 1, "the stub body carries it as well"
+    restarted.journal_event({"event": "Location", "StarSystem": "First", "SystemAddress": 1})
+    assert restarted.current_system_address == 1 and sorted(restarted.system_bodies) == [1]
+    restarted.journal_event({"event": "CarrierJump", "StarSystem": "Second", "SystemAddress": 2})
+    assert restarted.current_system_name == "Second" and not restarted.system_bodies
+    assert restarted.history.unfinished_bodies(10.0) == [("First", "First 1", 38.0)]
+
+
+def test_localised_names():
+    dut: ExplorationHelper = fresh_helper()
+    dut.register_organic({
+        "event": "ScanOrganic", "ScanType": "Log",
+        "Genus": "$Codex_Ent_Bacterial_Genus_Name;", "Genus_Localised": "Bakterium",
+        "Species": "$Codex_Ent_Bacterial_04_Name;", "Species_Localised": "Bakterium Acies",
+        "SystemAddress": 357254206266, "Body": 15
+    })
+    dut.register_organic({
+        "event": "ScanOrganic", "ScanType": "Analyse",
+        "Genus": "$Codex_Ent_Bacterial_Genus_Name;", "Genus_Localised": "Bacterium",
+        "Species": "$Codex_Ent_Bacterial_04_Name;", "Species_Localised": "Bacterium Acies",
+        "SystemAddress": 357254206266, "Body": 15
+    })
+    scans: list[ScanResult] = dut.bio_signs[15]
+    # the same species, whatever language the journal was written in
+    assert len(scans) == 1
+    assert scans[0].name == "Bacterium Acies" and scans[0].is_done()
+    assert scans[0].get_value_range()[0] < 999.0
+
+
+def test_instrumentation():
+    from instrumentation import Instrumentation
+
+    config: FakeConfig = FakeConfig()
+    config.data = {}
+    dut: ExplorationHelper = ExplorationHelper(
+        logging.getLogger("pytest"), config, tk, instrumentation=Instrumentation()
+    )
+    dut.frame_init(tk.Widget())
+    dut.journal_event({"event": "FSDJump", "StarSystem": "Test"})
+    dut.journal_event({"event": "Music", "MusicTrack": "Exploration"})
+    for body_id in (1, 2):
+        dut.journal_event({
+            "event": "FSSBodySignals", "BodyName": f"Test {body_id}", "BodyID": body_id,
+            "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+        })
+    tk.run_after()
+
+    stats = dut.instrumentation.stats
+    assert stats["event.FSSBodySignals"].count == 2
+    assert "event.Music" not in stats, "only handled events are timed"
+    assert stats["valuation"].count == 2
+    assert stats["rendering"].count >= 1 and stats["persistence"].count == 1
+
+
+def test_slow_event_profile(tmp_path):
+    from instrumentation import SlowEventProfiler
+
+    profiler: SlowEventProfiler = SlowEventProfiler(str(tmp_path), threshold=0.0)
+    dut: ExplorationHelper = fresh_helper()
+    dut.profiler = profiler
+    dut.journal_event({"event": "FSDJump", "StarSystem": "Test"})
+    dut.journal_event({"event": "Scan", "BodyName": "Test 1", "BodyID": 1, "PlanetClass": "Earthlike body"})
+    dut.shutdown()
+    assert profiler.sampler is None, "stopped on shutdown"
+    # sampled, if the sampler got a look in while the events were handled
+    assert all(p.name.endswith(("-FSDJump-0bodies.folded", "-Scan-1bodies.folded")) for p in tmp_path.iterdir())
+    assert profiler.captured == len(list(tmp_path.iterdir()))
+
+
+def test_virtual_grid():
+    dut: ExplorationHelper = fresh_helper()
+    dut.frame_init(tk.Widget())
+    tk.reset_operations()
+    for body_id in range(1, 41):
+        dut.register_body_scan({
+            "event": "Scan", "BodyName": f"Test {body_id}", "BodyID": body_id, "PlanetClass": "Earthlike body",
+            "WasMapped": body_id % 2 == 0
+        })
+        dut.register_detail_scan({
+            "event": "SAASignalsFound", "BodyName": f"Test {body_id}", "BodyID": body_id,
+            "Genuses": [{"Genus": "", "Genus_Localised": f"Genus {n}"} for n in range(10)]
+        })
+    tk.run_after()
+    renderer = dut.renderer
+    assert len(renderer.rows) == 40 and renderer.column_count() == 12
+    # 12 x 8 pooled labels plus two scrollbars, however large the system
+    assert tk.operations['create'] == 12 * 8 + 2
+    assert len(dut.tk_frame.winfo_children()) == 12 * 8 + 2
+
+    tk.reset_operations()
+    renderer.vertical.widget.command('scroll', '1', 'pages')
+    assert renderer.first_row == 12
+    assert tk.operations['create'] == 0 and tk.operations['destroy'] == 0
+    assert renderer.slots[0][0].widget.text.endswith("13")
+    # odd rows are not mapped (gold background), even ones reset to the default background
+    assert renderer.slots[0][0].widget.background == 'gold' and renderer.slots[1][0].widget.background == 'd'
+
+    renderer.horizontal.widget.command('moveto', '1.0')
+    assert renderer.first_column == 4
+    assert renderer.slots[0][7].widget.text.startswith("Genus 9")
+    assert renderer.slots[0][0].widget.text.endswith("13"), "name column does not scroll"
+
+    renderer.yview('moveto', '1.0')
+    assert renderer.first_row == 28 and renderer.vertical.widget.view == (0.7, 1.0)
+
+    # shrinking back: scrollbars go away, unused labels are hidden but kept
+    dut.clear_all()
+    dut.flush()
+    assert not renderer.vertical.visible and not renderer.horizontal.visible
+    assert not dut.tk_frame.grid
+
+
+def test_valuation_worker():
+    from instrumentation import Instrumentation
+
+    dut: ExplorationHelper = fresh_helper()
+    dut.instrumentation = Instrumentation()
+    dut.start_worker()
+    dut.frame_init(tk.Widget())
+    dut.journal_event({"event": "FSDJump", "StarSystem": "Test"})
+    dut.journal_event({"event": "Music", "MusicTrack": "Exploration"})
+    for body_id in (1, 2, 3):
+        dut.journal_event({
+            "event": "FSSBodySignals", "BodyName": f"Test {body_id}", "BodyID": body_id,
+            "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+        })
+    dut.worker.wait_idle()
+    assert dut.worker.thread.is_alive()
+    snapshot = dut.worker.snapshot
+    assert snapshot.system_name == "Test" and len(snapshot.rows) == 3
+    assert dut.renderer.rows == [], "tk only renders when polling"
+
+    tk.run_after()
+    assert dut.rendered_version == snapshot.version
+    assert len(dut.renderer.rows) == 3
+    tk.reset_operations()
+    tk.run_after()
+    assert tk.operations == {'create': 0, 'destroy': 0, 'configure': 0, 'grid': 0}, "no new snapshot"
+    dut.worker.wait_idle()
+    assert dut.instrumentation.stats["rendering"].count == 2, "rendering times are added by the worker"
+
+    dut.shutdown()
+    assert not dut.worker.thread.is_alive()
+    assert dut.config.data["explorationhelper.current_system"] == "Test"
+    assert len(dut.config.data["explorationhelper.known_bodies"]) == 3
+
+
+def test_worker_write_behind():
+    import threading
+    import time
+
+    dut: ExplorationHelper = fresh_helper()
+    dut.persist_delay_ms = 50
+    writers: set[str] = set()
+    config_set = dut.config.set
+    dut.config.set = lambda key, value: writers.add(threading.current_thread().name) or config_set(key, value)
+    dut.start_worker()
+    dut.frame_init(tk.Widget())
+    dut.journal_event({"event": "FSDJump", "StarSystem": "Test", "SystemAddress": 1})
+    dut.journal_event({"event": "Scan", "BodyName": "Test 1", "BodyID": 1, "PlanetClass": "Earthlike body"})
+
+    # the last change is written without another event, and polling stops after that
+    for _ in range(100):
+        if not dut.polling:
+            break
+        time.sleep(0.01)
+        tk.run_after()
+    assert not dut.polling and tk.pending_after == []
+    assert dut.config.data["explorationhelper.current_system"] == "Test"
+    assert len(dut.config.data["explorationhelper.known_bodies"]) == 1
+    assert writers == {threading.current_thread().name}, "the EDMC config is only written by the tk thread"
+
+    dut.journal_event({"event": "Scan", "BodyName": "Test 2", "BodyID": 2, "PlanetClass": "Water world"})
+    assert dut.polling and len(tk.pending_after) == 1, "an event starts polling again"
+    dut.shutdown()
+    assert len(dut.config.data["explorationhelper.known_bodies"]) == 2
+    assert writers == {threading.current_thread().name}
+
+
+def test_ingest():
+    from instrumentation import Instrumentation
+
+    config: FakeConfig = FakeConfig()
+    config.data = {}
+    tk.pending_after.clear()
+    dut: ExplorationHelper = ExplorationHelper(
+        logging.getLogger("pytest"), config, tk, instrumentation=Instrumentation()
+    )
+    dut.frame_init(tk.Widget())
+    events: list[dict] = [{"event": "FSDJump", "StarSystem": "Old"}]
+    events += [{"event": "Scan", "BodyName": "Old 1", "BodyID": 1, "PlanetClass": "Earthlike body"}]
+    events += [{"event": "FSDJump", "StarSystem": "Test"}]
+    for body_id in range(1, 6):
+        events += [
+            {"event": "Scan", "BodyName": f"Test {body_id}", "BodyID": body_id, "PlanetClass": "Rocky body"},
+            {
+                "event": "FSSBodySignals", "BodyName": f"Test {body_id}", "BodyID": body_id,
+                "Signals": [{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": 2}]
+            },
+            {
+                "event": "SAASignalsFound", "BodyName": f"Test {body_id}", "BodyID": body_id,
+                "Genuses": [{"Genus": "$Codex_Ent_Bacterial_Genus_Name;", "Genus_Localised": "Bacterium"}]
+            },
+        ]
+    dut.ingest(events)
+
+    stats = dut.instrumentation.stats
+    assert stats["valuation"].count == 5, "once per changed body of the current system"
+    assert stats["rendering"].count == 2 and stats["persistence"].count == 1, "frame_init plus one commit"
+    assert tk.pending_after == [], "nothing left to schedule"
+    assert dut.config.data["explorationhelper.current_system"] == "Test"
+    assert len(dut.renderer.rows) == 5
+
+    one_by_one: ExplorationHelper = fresh_helper()
+    for entry in events:
+        one_by_one.journal_event(entry)
+    assert one_by_one.view_rows() == dut.view_rows(), "same result as handling the events one by one"
+
+
+def test_memory_diagnostics(caplog):
+    from instrumentation import MemoryTracker
+
+    memory: MemoryTracker = MemoryTracker(interval=3600.0)
+    dut: ExplorationHelper = fresh_helper()
+    dut.memory = memory
+    dut.frame_init(tk.Widget())
+    memory.start()
+    with caplog.at_level(logging.INFO, logger="pytest"):
+        for system in ("First", "Second"):
+            dut.journal_event({"event": "FSDJump", "StarSystem": system})
+            for body_id in (1, 2):
+                dut.journal_event({
+                    "event": "Scan", "BodyName": f"{system} {body_id}", "BodyID": body_id,
+                    "PlanetClass": "Earthlike body"
+                })
+            tk.run_after()
+        dut.shutdown()
+    lines: list[str] = [r.getMessage() for r in caplog.records if r.getMessage().startswith("memory ")]
+    assert memory.checkpoints == 3 and not memory.started
+    assert lines[0].startswith("memory at FSDJump from ?: traced ")
+    assert any(line.startswith("memory at FSDJump from First: ") for line in lines)
+    assert any(line.startswith("memory growth: ") for line in lines)
+    retained: str = next(line for line in lines if line.startswith("memory retained: "))
+    assert all(f"{root} " in retained for root in ("catalog", "valuation cache", "system_bodies", "bio_signs", "view"))
+    # the valuation cache is shared with whatever ran before
+    assert lines[-1].startswith("memory counts: 2 bodies, 0 scan results, ")
+    assert lines[-1].endswith(" cached valuations, 4 pooled labels, 4 widgets")
+
+
+def test_memory_diagnostics_with_worker(caplog):
+    from instrumentation import MemoryTracker
+
+    dut: ExplorationHelper = fresh_helper()
+    dut.memory = MemoryTracker(interval=3600.0)
+    dut.start_worker()
+    dut.frame_init(tk.Widget())
+    for body_id in (1, 2):
+        dut.journal_event({
+            "event": "Scan", "BodyName": f"Test {body_id}", "BodyID": body_id, "PlanetClass": "Earthlike body"
+        })
+    dut.worker.wait_idle()
+    tk.run_after()
+    with caplog.at_level(logging.INFO, logger="pytest"):
+        dut.shutdown()
+    lines: list[str] = [r.getMessage() for r in caplog.records if r.getMessage().startswith("memory counts: ")]
+    assert lines[-1].endswith(" cached valuations, 4 pooled labels, 4 widgets"), "counted on the tk thread"
+
+
+def test_memory_stopped_without_state():
+    from instrumentation import MemoryTracker
+
+    dut: ExplorationHelper = fresh_helper()
+    dut.memory = MemoryTracker()
+    dut.memory.start()
+    dut.shutdown()
+    assert not dut.loaded and not dut.memory.started, "tracing ends even if nothing was loaded"
@@ -7,5 +7,8 @@ class FakeConfig:
     def get_list(self, key: str, default: list = ()) -> list:
         return self.data[key] if key in self.data else default
 
+    def get_int(self, key: str, default: int = 0) -> int:
+        return self.data[key] if key in self.data else default
+
     def set(self, key: str, value: str|list|int) -> None:
         self.data[key] = value
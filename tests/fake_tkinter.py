@@ -6,18 +6,50 @@ W = 'w'
 LEFT = 'l'
 CENTER = 'c'
 RIGHT = 'r'
+NS = 'ns'
+EW = 'ew'
+VERTICAL = 'vertical'
+HORIZONTAL = 'horizontal'
 
 # nice color map: https://cs111.wellesley.edu/archive/cs111_fall14/public_html/labs/lab12/tkintercolor.html
 
+# widget operation counters, so tests can check how much work a redraw does
+operations: dict[str, int] = {'create': 0, 'destroy': 0, 'configure': 0, 'grid': 0}
+
+
+def reset_operations() -> None:
+    for k in operations:
+        operations[k] = 0
+
+
+# callbacks registered with after(), in order; run them with run_after()
+pending_after: list[tuple[int, callable]] = []
+
+
+def run_after() -> int:
+    """
+    Run the pending after() callbacks as if their time has come; return how many ran.
+    Callbacks scheduled meanwhile (e.g. a polling loop rescheduling itself) wait for the next call.
+    """
+    due: list = pending_after[:]
+    del pending_after[:]
+    for _ms, func in due:
+        func()
+    return len(due)
+
+
 class Widget:
     def __init__(self, parent: 'Widget|None' = None):
         self.parent: Widget|None = parent
         self.children: list[Widget] = []
+        self.bindings: dict[str, callable] = {}
+        operations['create'] += 1
         if parent:
             parent.add_child(self)
 
     def destroy(self, call_parent: bool = True):
         # print(f"Destroy widget {self}")
+        operations['destroy'] += 1
         for c in self.children:
             c.destroy(call_parent=False)
         self.children.clear()
@@ -30,6 +62,18 @@ class Widget:
     def remove_child(self, child: 'Widget') -> None:
         self.children.remove(child)
 
+    def bind(self, sequence: str, func: callable) -> None:
+        self.bindings[sequence] = func
+
+    def grid_remove(self) -> None:
+        assert isinstance(self.parent, Frame)
+        operations['grid'] += 1
+        self.parent.forget_grid(self)
+
+    def after(self, ms: int, func: callable) -> str:
+        pending_after.append((ms, func))
+        return f'after#{len(pending_after)}'
+
     def winfo_children(self) -> list['Widget']:
         # need a copy so we can modify while iterating
         return list(self.children)
@@ -47,6 +91,7 @@ class Frame(Widget):
 
     def set_grid(self, element: Widget, row: int, column: int, _sticky: str) -> None:
         # assert element in self.children
+        self.forget_grid(element)
         if row not in self.grid:
             self.grid[row] = {column: element}
         self.grid[row][column] = element
@@ -64,32 +109,66 @@ class Frame(Widget):
             )
             print(txt)
 
-    def remove_child(self, child: 'Widget') -> None:
+    def forget_grid(self, element: Widget) -> None:
         for ri, rd in self.grid.items():
             for ci, cd in rd.items():
-                if cd == child:
+                if cd == element:
                     rd.pop(ci)
                     break
             if not rd:
                 self.grid.pop(ri)
                 break
+
+    def remove_child(self, child: 'Widget') -> None:
+        self.forget_grid(child)
         super().remove_child(child)
 
 
 class Label(Widget):
     # self.tk_frame, text=f'[{body_name}]: ', justify=tk.RIGHT)
-    def __init__(self, parent: Widget, text: str, justify: str = CENTER, fg: str = 'd', font: str = 'd'):
+    def __init__(
+            self, parent: Widget, text: str, justify: str = CENTER, fg: str = 'd', font: str = 'd', background: str = 'd'
+    ):
         super().__init__(parent)
         self.text: str = text
         self.justify: str = justify
         self.fg: str = fg
         self.font: str = font
+        self.background: str = background
 
     def __str__(self) -> str:
         return f'{self.text} [[{self.justify}, {self.fg}, {self.font}]]'
 
+    def configure(self, option: str|None = None, **kwargs) -> tuple|None:
+        if option is not None:
+            # query like tk: (name, db name, db class, default, current value)
+            assert hasattr(self, option)
+            return option, option, option.capitalize(), 'd', getattr(self, option)
+        operations['configure'] += 1
+        for k, v in kwargs.items():
+            assert hasattr(self, k)
+            setattr(self, k, v)
+        return None
+
     def grid(self, row: int, column: int, sticky: str = W) -> None:
         assert isinstance(self.parent,Frame)
+        operations['grid'] += 1
+        self.parent.set_grid(self, row, column, sticky)
+
+
+class Scrollbar(Widget):
+    def __init__(self, parent: Widget, orient: str = VERTICAL, command: callable = None):
+        super().__init__(parent)
+        self.orient: str = orient
+        self.command: callable = command
+        self.view: tuple[float, float] = (0.0, 1.0)
+
+    def set(self, first: float, last: float) -> None:
+        self.view = (first, last)
+
+    def grid(self, row: int, column: int, rowspan: int = 1, columnspan: int = 1, sticky: str = '') -> None:
+        assert isinstance(self.parent, Frame)
+        operations['grid'] += 1
         self.parent.set_grid(self, row, column, sticky)
 
 
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+
+class ValuationCache:
+    """
+    Bounded LRU memo for valuation results, keyed by filter fingerprint (see EligibilityIndex.fingerprint).
+    Entries are only valid for the index they were computed with; when the catalog changes and
+    a new index is built, the cache empties itself.
+    """
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize: int = maxsize
+        self.entries: OrderedDict = OrderedDict()
+        self.owner: any = None
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get(self, owner: any, key: any, compute: callable) -> any:
+        """
+        Return the cached value for <key>, or compute and store it.
+        Cached values are shared, callers must not modify them.
+        """
+        if owner is not self.owner:
+            self.clear()
+            self.owner = owner
+
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value: any = compute()
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+
+def test_cache() -> None:
+    owner: object = object()
+    cache: ValuationCache = ValuationCache(maxsize=2)
+    assert cache.get(owner, 1, lambda: 'one') == 'one'
+    assert cache.get(owner, 2, lambda: 'two') == 'two'
+    assert cache.get(owner, 1, lambda: 'not computed') == 'one'
+    # 2 is least recently used and gets evicted
+    assert cache.get(owner, 3, lambda: 'three') == 'three'
+    assert cache.get(owner, 2, lambda: 'two again') == 'two again'
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)
+
+    # a new owner (rebuilt index) invalidates everything
+    assert cache.get(object(), 2, lambda: 'fresh') == 'fresh'
+    assert len(cache) == 1
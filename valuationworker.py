@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+
+
+class ViewSnapshot:
+    """
+    Immutable result of the worker for the tk side: the table rows (see ExplorationHelper.view_rows)
+    as they were after a batch of events, and the persisted state to be written to the EDMC config
+    (None with a state log). A new snapshot is published as a whole, never changed afterwards.
+    """
+    __slots__ = ('version', 'system_name', 'rows', 'config')
+
+    def __init__(self, version: int, system_name: str, rows: tuple, config: dict|None = None):
+        self.version: int = version
+        self.system_name: str = system_name
+        self.rows: tuple = rows
+        self.config: dict|None = config
+
+
+class ValuationWorker:
+    """
+    Background thread owning the exploration state: journal events are queued by the tk thread,
+    and all handling (valuation, serialization, persistence) happens here.
+    After each batch of queued tasks, a ViewSnapshot is published, which the tk thread picks up
+    by polling with after() (tk itself must only be used from its own thread).
+    The state is persisted write-behind into a copy of the config, which the tk side writes to EDMC's;
+    after the last change of a burst, that happens persist_delay_ms later, even if no further event comes.
+    """
+    # most tasks handled before publishing a snapshot
+    batch_size: int = 200
+
+    def __init__(self, helper: 'ExplorationHelper'):
+        self.helper: 'ExplorationHelper' = helper
+        self.tasks: queue.Queue = queue.Queue()
+        self.snapshot: ViewSnapshot = ViewSnapshot(0, "", ())
+        self.last_persist: float = time.monotonic()
+        # changes waiting for the write-behind; read by the tk thread, see idle()
+        self.persist_pending: bool = False
+        self.published_writes: int = 0
+        self.thread: threading.Thread = threading.Thread(
+            target=self.run, name='exploration-valuation', daemon=True
+        )
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def submit(self, task: callable) -> None:
+        self.tasks.put(task)
+
+    def stop(self) -> None:
+        """Finish the queued tasks and end the thread"""
+        if self.thread.is_alive():
+            self.tasks.put(None)
+            self.thread.join()
+
+    def idle(self) -> bool:
+        """Nothing queued, and nothing left to persist: no new snapshot until the next submit"""
+        return self.tasks.unfinished_tasks == 0 and not self.persist_pending
+
+    def wait_idle(self) -> None:
+        """Block until every task submitted so far is handled and published"""
+        self.tasks.join()
+
+    def run(self) -> None:
+        while True:
+            try:
+                batch: list[callable|None] = [self.tasks.get(timeout=self.persist_wait())]
+            except queue.Empty:
+                # the burst is over: write its last changes now, rather than with the next event
+                self.persist()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.tasks.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping: bool = False
+            for task in batch:
+                if task is None:
+                    stopping = True
+                    continue
+                try:
+                    task()
+                except Exception as e:
+                    self.helper.logger.exception(f'Failed to handle journal event: {e}')
+
+            self.publish()
+            self.persist_if_due()
+            for _ in batch:
+                self.tasks.task_done()
+            if stopping:
+                return
+
+    def publish(self) -> None:
+        """New snapshot if the view changed, or the persisted state"""
+        helper: 'ExplorationHelper' = self.helper
+        writes: int = helper.persistence.writes
+        if not helper.redraw_pending and writes == self.published_writes and self.snapshot.version:
+            return
+        rows: tuple = (
+            tuple(helper.view_rows()) if helper.redraw_pending or not self.snapshot.version else self.snapshot.rows
+        )
+        helper.redraw_pending = False
+        self.published_writes = writes
+        self.snapshot = ViewSnapshot(
+            self.snapshot.version + 1, helper.current_system_name, rows,
+            dict(helper.persistence.config.data) if helper.state_log is None else None
+        )
+
+    def persist_wait(self) -> float|None:
+        """Seconds until pending changes are due for the write-behind; None: nothing pending"""
+        if not self.persist_pending:
+            return None
+        due: float = self.last_persist + self.helper.persist_delay_ms / 1000.0
+        return max(due - time.monotonic(), 0.0)
+
+    def persist_if_due(self) -> None:
+        """Write-behind, at most once per persist_delay_ms; otherwise remember that changes are pending"""
+        helper: 'ExplorationHelper' = self.helper
+        if helper.state_log is not None:
+            return
+        if time.monotonic() - self.last_persist >= helper.persist_delay_ms / 1000.0:
+            self.persist()
+        else:
+            self.persist_pending = helper.persistence.is_dirty(
+                helper.current_system_name, helper.current_system_address
+            )
+
+    def persist(self) -> None:
+        """Persist into the copy of the config, and publish it for the tk thread to write"""
+        self.last_persist = time.monotonic()
+        self.helper.persist()
+        self.publish()
+        self.persist_pending = False